@@ -0,0 +1,132 @@
+"""
+Benchmark de l'enregistrement des plans (Persistence.save_plan).
+
+Compare l'insertion Core en executemany à l'ancien chemin ORM (un SeatingORM
+ajouté par siège), puis le format compact ("packed", un blob par session) :
+temps d'écriture, de relecture et taille du fichier.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_persistence.py
+    python benchmarks/bench_persistence.py --output bench_persistence.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import delete
+
+from msb.infra.models_orm import SeatingORM
+from msb.services.persistence import Persistence
+
+# (participants, sessions)
+GRID = [(100, 8), (400, 12), (1000, 12)]
+
+
+def legacy_save_plan(persistence: Persistence, plan: list) -> None:
+    """Ancien chemin: un objet ORM par siège, ajouté à la session."""
+    with persistence.session_scope() as s:
+        s.execute(delete(SeatingORM).where(SeatingORM.event_id == persistence.event_id))
+        for s_idx, tables in enumerate(plan):
+            for t_idx, pids in enumerate(tables):
+                for pid in pids:
+                    s.add(SeatingORM(
+                        event_id=persistence.event_id,
+                        session_index=s_idx,
+                        table_index=t_idx,
+                        participant_id=int(pid),
+                    ))
+
+
+def _make_event(db_path: Path, n: int) -> tuple[Persistence, list[int]]:
+    persistence = Persistence()
+    now = datetime.now()
+    persistence.new_event(db_path, "Bench", now, now + timedelta(hours=2))
+    for i in range(n):
+        persistence.add_participant(f"P{i}", f"N{i}", "Job", False, False)
+    return persistence, [p.id for p in persistence.list_participants()]
+
+
+def _plan(ids: list[int], sessions: int) -> list:
+    tables = max(1, len(ids) // 8)
+    return [
+        [ids[(t + s) % tables::tables] for t in range(tables)]
+        for s in range(sessions)
+    ]
+
+
+def _file_size(persistence: Persistence) -> int:
+    # taille réelle après checkpoint du journal WAL et compactage
+    with persistence.engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return persistence.db_path.stat().st_size
+
+
+def _best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, help="fichier JSON de résultats")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, sessions in GRID:
+            persistence, ids = _make_event(Path(tmp) / f"bench_{n}.db", n)
+            plan = _plan(ids, sessions)
+            legacy = _best_of(lambda: legacy_save_plan(persistence, plan), args.repeat)
+            bulk = _best_of(lambda: persistence.save_plan(plan), args.repeat)
+            assert persistence.load_plan() == plan
+            load_rows = _best_of(persistence.load_plan, args.repeat)
+            size_rows = _file_size(persistence)
+
+            persistence.plan_storage = "packed"
+            packed = _best_of(lambda: persistence.save_plan(plan), args.repeat)
+            assert persistence.load_plan() == plan
+            load_packed = _best_of(persistence.load_plan, args.repeat)
+            size_packed = _file_size(persistence)
+
+            seats = sum(len(t) for tables in plan for t in tables)
+            results.append({
+                "case": f"N={n} S={sessions}",
+                "seats": seats,
+                "legacy_orm_seconds": legacy,
+                "save_plan_seconds": bulk,
+                "speedup": legacy / bulk if bulk else None,
+                "load_rows_seconds": load_rows,
+                "file_bytes_rows": size_rows,
+                "save_packed_seconds": packed,
+                "load_packed_seconds": load_packed,
+                "file_bytes_packed": size_packed,
+            })
+            print(f"N={n:<5} S={sessions:<3} sièges={seats:<6} ORM={legacy * 1000:8.1f} ms  "
+                  f"save_plan={bulk * 1000:8.1f} ms  (x{legacy / bulk:.1f})")
+            print(f"{'':>22}rows  : lecture={load_rows * 1000:7.1f} ms  fichier={size_rows / 1024:7.0f} Kio")
+            print(f"{'':>22}packed: écriture={packed * 1000:6.1f} ms  lecture={load_packed * 1000:7.1f} ms  "
+                  f"fichier={size_packed / 1024:7.0f} Kio")
+
+    if args.output:
+        args.output.write_text(json.dumps({"results": results}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark du planner: débit et qualité des plans sur une grille de tailles d'événement.
+
+Usage (depuis la racine du dépôt) :
+    python benchmarks/bench_planner.py --output bench_planner.json
+    python benchmarks/bench_planner.py --output new.json --compare bench_planner.json
+    python benchmarks/bench_planner.py --quick
+
+Chaque cas enregistre le temps (meilleur de --repeat exécutions), le pic mémoire
+(tracemalloc, exécution séparée), les paires en doublon, les paires jamais rencontrées
+et les retours à une même table. Le JSON produit sert de référence pour --compare.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from msb.services.planner import Planner, score_plan
+
+# (N, T, S): tables de 6 à 10 places, un chef par table comme dans l'application
+GRID = [
+    (50, 6, 6),
+    (100, 12, 8),
+    (200, 25, 10),
+    (400, 50, 12),
+    (400, 50, 20),
+    (1000, 125, 12),
+    (2000, 250, 12),
+    (3000, 375, 12),
+]
+QUICK_GRID = [(50, 6, 6), (200, 25, 10), (400, 50, 12)]
+
+
+def _capacities(n: int, t: int) -> list[int]:
+    """Même répartition que PlanPage: 6 partout puis le reste en tourniquet (max 10)."""
+    caps = [6] * t
+    remaining = n - 6 * t
+    idx = 0
+    while remaining > 0:
+        if caps[idx] < 10:
+            caps[idx] += 1
+            remaining -= 1
+        idx = (idx + 1) % t
+    return caps
+
+
+def run_case(planner: Planner, n: int, t: int, s: int, *, seed: int, repeat: int) -> dict:
+    params = dict(
+        num_tables=t,
+        sessions=s,
+        table_capacities=_capacities(n, t),
+        fixed_leads=list(range(t)),
+        people=list(range(t, n)),
+        seed=seed,
+    )
+
+    timings = []
+    plan = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        plan = planner.build_plan(**params)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    planner.build_plan(**params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    score = score_plan(plan, params["fixed_leads"])
+    return {
+        "case": f"N={n} T={t} S={s}",
+        "n": n,
+        "tables": t,
+        "sessions": s,
+        "seconds": min(timings),
+        "peak_bytes": peak,
+        "repeated_pairs": score.repeated_pairs,
+        "never_met": score.never_met,
+        "retable_visits": score.retable_visits,
+    }
+
+
+def compare(results: list[dict], baseline: list[dict]) -> None:
+    previous = {r["case"]: r for r in baseline}
+    print(f"\n{'cas':<24}{'temps':>10}{'mémoire':>10}{'doublons':>12}{'re-tables':>12}")
+    for r in results:
+        old = previous.get(r["case"])
+        if old is None:
+            continue
+        time_ratio = r["seconds"] / old["seconds"] if old["seconds"] else float("nan")
+        mem_ratio = r["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else float("nan")
+        print(
+            f"{r['case']:<24}{time_ratio:>9.2f}x{mem_ratio:>9.2f}x"
+            f"{r['repeated_pairs'] - old['repeated_pairs']:>+12d}"
+            f"{r['retable_visits'] - old['retable_visits']:>+12d}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", type=Path, help="fichier JSON de résultats")
+    parser.add_argument("--compare", type=Path, help="JSON de référence à comparer")
+    parser.add_argument("--backend", default="auto", choices=["auto", "python", "numpy"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-n", type=int, default=None, help="ignore les cas plus grands")
+    parser.add_argument("--quick", action="store_true", help="petite grille pour un contrôle rapide")
+    args = parser.parse_args(argv)
+
+    planner = Planner(backend=args.backend)
+    grid = QUICK_GRID if args.quick else GRID
+    results = []
+    for n, t, s in grid:
+        if args.max_n is not None and n > args.max_n:
+            continue
+        r = run_case(planner, n, t, s, seed=args.seed, repeat=max(1, args.repeat))
+        results.append(r)
+        print(
+            f"{r['case']:<24}{r['seconds']:>9.3f}s{r['peak_bytes'] / 1e6:>9.1f} Mo"
+            f"  doublons={r['repeated_pairs']} jamais={r['never_met']} re-tables={r['retable_visits']}"
+        )
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": args.backend,
+        "seed": args.seed,
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding="utf-8"))["results"])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
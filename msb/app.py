@@ -1,5 +1,5 @@
 from __future__ import annotations
-import logging, sys
+import logging, multiprocessing, sys
 from pathlib import Path
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QApplication
@@ -14,6 +14,8 @@ from msb.ui.main_window import MainWindow
 from msb.ui.theme import ThemeManager   # ✅
 
 def main() -> int:
+    # requis pour le multi-départ du planner (pool de processus "spawn") dans l'exécutable PyInstaller
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     resources_root = get_resources_root()
@@ -25,7 +27,9 @@ def main() -> int:
     setup_logging(cfg.data_dir / "logs")
     logging.getLogger(__name__).info("%s %s démarré", APP_NAME, APP_VERSION)
 
-    persistence = Persistence()
+    persistence = Persistence(sqlite_profile=cfg.sqlite_profile, plan_storage=cfg.plan_storage)
+    # fermeture propre des fichiers de réunion (connexions, journal WAL) en quittant
+    app.aboutToQuit.connect(persistence.engines.dispose_all)
 
     import_svc = ImportService(persistence)
     export_svc = ExportService(persistence=persistence)
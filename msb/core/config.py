@@ -1,5 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
+import os
 import sys
 from pathlib import Path
 from PySide6.QtGui import QPalette
@@ -11,6 +12,10 @@ from .constants import APP_NAME
 class AppConfig:
     data_dir: Path
     theme_path: Path
+    # profil SQLite ("fast" par défaut, "durable" pour forcer chaque commit sur disque)
+    sqlite_profile: str = "fast"
+    # format du plan en base ("rows" lisible par les anciennes versions, "packed" plus compact)
+    plan_storage: str = "rows"
 
 
 def get_resources_root() -> Path:
@@ -31,7 +36,18 @@ def load_config() -> AppConfig:
     data_dir = Path.cwd() / "data"
     theme_path = get_resources_root() / "msb" / "ui" / "style.qss"
     data_dir.mkdir(parents=True, exist_ok=True)
-    return AppConfig(data_dir=data_dir, theme_path=theme_path)
+    sqlite_profile = os.environ.get("MSB_SQLITE_PROFILE", "fast").strip().lower()
+    if sqlite_profile not in ("fast", "durable"):
+        sqlite_profile = "fast"
+    plan_storage = os.environ.get("MSB_PLAN_STORAGE", "rows").strip().lower()
+    if plan_storage not in ("rows", "packed"):
+        plan_storage = "rows"
+    return AppConfig(
+        data_dir=data_dir,
+        theme_path=theme_path,
+        sqlite_profile=sqlite_profile,
+        plan_storage=plan_storage,
+    )
 
 def is_system_dark(app: QApplication) -> bool:
     """Détecte si le thème système est sombre."""
@@ -1,12 +1,91 @@
 from __future__ import annotations
+import ntpath
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 Base = declarative_base()
 
-def make_engine(db_path: Path):
-    return create_engine(f"sqlite:///{db_path}", echo=False, future=True)
+# Profils SQLite appliqués à chaque connexion (PRAGMA de connexion).
+# - "fast" (défaut) : journal WAL + synchronous=NORMAL → commits rapides ; la base
+#   reste cohérente après un crash, seules les dernières transactions peuvent être perdues.
+# - "durable" : journal classique + synchronous=FULL → chaque commit est sur disque.
+SQLITE_PROFILES = {
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,       # ~16 Mo (valeur négative = Kio)
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+    },
+    "durable": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_SQLITE_PROFILE = "fast"
+
+
+# types de lecteur (GetDriveTypeW) sûrs pour WAL : amovible, fixe, CD-ROM, disque RAM
+_LOCAL_DRIVE_TYPES = {2, 3, 5, 6}
+
+
+def _drive_type(root: str) -> int:
+    import ctypes
+    return ctypes.windll.kernel32.GetDriveTypeW(root)
+
+
+def _is_network_path(db_path: Path) -> bool:
+    # WAL et mmap ne sont pas fiables sur un partage réseau
+    text = str(db_path)
+    if text.startswith("\\\\") or text.startswith("//"):
+        # chemin UNC (\\serveur\partage)
+        return True
+    if sys.platform != "win32":
+        return False
+    # lecteur réseau monté avec une lettre (Z:\) ; dans le doute, on le traite comme réseau
+    drive = ntpath.splitdrive(text)[0]
+    if not drive:
+        return True
+    try:
+        return _drive_type(drive + "\\") not in _LOCAL_DRIVE_TYPES
+    except (AttributeError, OSError):
+        return True
+
+
+def make_engine(db_path: Path, profile: str = DEFAULT_SQLITE_PROFILE):
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Profil SQLite inconnu : {profile!r}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if _is_network_path(db_path):
+        # WAL exige une mémoire partagée locale : sur un partage réseau on garde le journal classique
+        pragmas["journal_mode"] = "DELETE"
+        pragmas.pop("mmap_size", None)
+
+    engine = create_engine(f"sqlite:///{db_path}", echo=False, future=True)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                try:
+                    cursor.execute(f"PRAGMA {name}={value}")
+                except sqlite3.OperationalError:
+                    # changer de journal exige d'être seul sur le fichier :
+                    # si une autre connexion est ouverte, on garde le mode actuel
+                    if name != "journal_mode":
+                        raise
+        finally:
+            cursor.close()
+
+    return engine
 
 def make_session_factory(engine):
     # 👇 clé du fix : expire_on_commit=False
@@ -17,3 +96,80 @@ def make_session_factory(engine):
         expire_on_commit=False,   # ✅ objets restent “vivants” après commit
         future=True,
     )
+
+def upgrade_schema(engine):
+    """
+    Met à niveau une base existante : crée les tables manquantes et les index
+    ajoutés depuis (create_all ne les crée pas sur une table déjà présente).
+    Le schéma est d'abord lu (sqlite_master) : rien n'est écrit s'il est à jour,
+    ce qui évite de verrouiller en écriture un fichier ouvert en lecture.
+    """
+    with engine.connect() as conn:
+        insp = inspect(conn)
+        existing = set(insp.get_table_names())
+        missing_tables = [t for t in Base.metadata.sorted_tables if t.name not in existing]
+        missing_indexes = [
+            index
+            for table in Base.metadata.sorted_tables
+            if table.name in existing
+            for index in table.indexes
+            if index.name not in {ix["name"] for ix in insp.get_indexes(table.name)}
+        ]
+    if missing_tables:
+        # les index des nouvelles tables sont créés avec elles
+        Base.metadata.create_all(engine, tables=missing_tables)
+    for index in missing_indexes:
+        index.create(engine)
+
+
+class EngineRegistry:
+    """
+    Moteurs SQLAlchemy réutilisés d'une ouverture à l'autre, un par fichier
+    (clé : chemin résolu + profil SQLite).
+    - release() ferme les connexions du fichier (le moteur reste prêt pour la prochaine ouverture)
+    - au-delà de max_engines, le moteur le moins récemment utilisé est libéré (dispose)
+    """
+
+    def __init__(self, max_engines: int = 4) -> None:
+        self.max_engines = max(1, int(max_engines))
+        self._engines: OrderedDict[tuple[Path, str], object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(db_path: Path, profile: str) -> tuple[Path, str]:
+        return Path(db_path).resolve(), profile
+
+    def get(self, db_path: Path, profile: str = DEFAULT_SQLITE_PROFILE):
+        key = self._key(db_path, profile)
+        evicted = []
+        with self._lock:
+            engine = self._engines.pop(key, None)
+            if engine is None:
+                engine = make_engine(key[0], profile)
+            self._engines[key] = engine
+            while len(self._engines) > self.max_engines:
+                evicted.append(self._engines.popitem(last=False)[1])
+        for old in evicted:
+            old.dispose()
+        return engine
+
+    def release(self, db_path: Path, profile: str = DEFAULT_SQLITE_PROFILE) -> None:
+        """Ferme les connexions ouvertes sur ce fichier (verrous et journal WAL libérés)."""
+        with self._lock:
+            engine = self._engines.get(self._key(db_path, profile))
+        if engine is not None:
+            engine.dispose()
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+
+# registre partagé par défaut (une seule Persistence dans l'application)
+engine_registry = EngineRegistry()
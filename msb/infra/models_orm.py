@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime  # ✅ AJOUT
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Integer, String, Boolean, DateTime, ForeignKey, UniqueConstraint, Index, LargeBinary
 from msb.infra.db import Base
 
 
@@ -11,7 +11,7 @@ class EventORM(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
-    date_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # ✅
+    date_start: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)  # ✅ index : liste de l'archive
     date_end: Mapped[datetime] = mapped_column(DateTime, nullable=False)    # ✅
 
     # paramètres d’organisation
@@ -32,6 +32,9 @@ class EventORM(Base):
     seatings: Mapped[list["SeatingORM"]] = relationship(
         back_populates="event", cascade="all, delete-orphan"
     )
+    seating_blobs: Mapped[list["SeatingBlobORM"]] = relationship(
+        back_populates="event", cascade="all, delete-orphan"
+    )
 
 
 class ParticipantORM(Base):
@@ -62,3 +65,25 @@ class SeatingORM(Base):
     participant_id: Mapped[int] = mapped_column(ForeignKey("participants.id"), nullable=False, index=True)
 
     event: Mapped["EventORM"] = relationship(back_populates="seatings")
+
+    __table_args__ = (
+        # lecture du plan (load_plan) : filtre par réunion, tri par session puis table
+        Index("ix_seatings_event_session_table", "event_id", "session_index", "table_index"),
+    )
+
+
+class SeatingBlobORM(Base):
+    """Plan au format compact : une ligne par session (voir msb.infra.plan_codec)."""
+    __tablename__ = "seating_blobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    event_id: Mapped[int] = mapped_column(ForeignKey("events.id"), nullable=False)
+    session_index: Mapped[int] = mapped_column(Integer, nullable=False)  # 0..S-1
+    format_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    event: Mapped["EventORM"] = relationship(back_populates="seating_blobs")
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "session_index", name="uq_seating_blob_session"),
+    )
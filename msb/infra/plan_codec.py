@@ -0,0 +1,47 @@
+"""
+Format compact d'une session de plan : un tableau d'entiers 32 bits (little-endian).
+
+Disposition (version 1) :
+    [version, T, taille_table_0, ..., taille_table_T-1, ids de la table 0..., ids de la table 1..., ...]
+
+Les ids sont rangés table par table, dans l'ordre du plan. Le décodage est une
+simple lecture de tableau, sans analyse ligne par ligne.
+"""
+from __future__ import annotations
+
+import sys
+from array import array
+
+FORMAT_VERSION = 1
+
+
+def encode_session(tables: list[list[int]]) -> bytes:
+    """Encode une session (liste de tables → ids) en blob versionné."""
+    data = array("i", [FORMAT_VERSION, len(tables)])
+    data.extend(len(t) for t in tables)
+    for t in tables:
+        data.extend(int(pid) for pid in t)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def decode_session(blob: bytes) -> list[list[int]]:
+    """Décode un blob produit par encode_session."""
+    data = array("i")
+    data.frombytes(blob)
+    if sys.byteorder != "little":
+        data.byteswap()
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        version = data[0] if data else None
+        raise ValueError(f"Format de session non pris en charge (version {version})")
+    T = data[1]
+    sizes = data[2:2 + T]
+    tables: list[list[int]] = []
+    pos = 2 + T
+    for size in sizes:
+        tables.append(data[pos:pos + size].tolist())
+        pos += size
+    if pos != len(data):
+        raise ValueError("Blob de session corrompu (taille incohérente)")
+    return tables
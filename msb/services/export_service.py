@@ -29,25 +29,28 @@ class ExportService:
         self.persistence = persistence
         self.logo_path = logo_path
 
-    def export_excel(self, output_path: str | Path) -> Path:
+    def export_excel(self, output_path: str | Path, snapshot=None) -> Path:
         """Exporte le plan (vues tables + participants) au format Excel."""
 
-        return self.export_plan_excel(output_path)
+        return self.export_plan_excel(output_path, snapshot=snapshot)
 
-    def export_plan_excel(self, output_path: str | Path) -> Path:
-        """Génère un Excel contenant le plan de table (vues table et participant)."""
+    def export_plan_excel(self, output_path: str | Path, snapshot=None) -> Path:
+        """
+        Génère un Excel contenant le plan de table (vues table et participant).
+        snapshot: EventSnapshot déjà lu par l'appelant (sinon lu ici).
+        """
 
-        persistence = self._require_persistence()
+        snap = self._snapshot(snapshot)
         output_path = Path(output_path)
 
-        event_info = persistence.get_event_info()
-        participants = list(persistence.list_participants())
-        plan = persistence.load_plan()
+        event_info = snap.event
+        participants = snap.participants
+        plan = snap.plan
 
         if not plan:
             raise RuntimeError("Aucun plan de table enregistré. Générez ou chargez un plan avant d'exporter.")
 
-        participants_by_id = {p.id: p for p in participants}
+        participants_by_id = snap.participants_by_id
         session_count = len(plan)
         table_count = len(plan[0]) if session_count else 0
 
@@ -103,10 +106,10 @@ class ExportService:
         wb.save(output_path)
         return output_path
 
-    def export_import_template(self, output_path: str | Path) -> Path:
+    def export_import_template(self, output_path: str | Path, snapshot=None) -> Path:
         """Exporte un modèle Excel pour réimport de participants."""
 
-        persistence = self._require_persistence()
+        snap = self._snapshot(snapshot)
         output_path = Path(output_path)
 
         wb = Workbook()
@@ -122,7 +125,7 @@ class ExportService:
         ]
         ws.append(headers)
 
-        participants = list(persistence.list_participants())
+        participants = snap.participants
         if participants:
             for p in participants:
                 ws.append(
@@ -141,7 +144,7 @@ class ExportService:
         wb.save(output_path)
         return output_path
 
-    def export_badges_pdf(self, output_path: str | Path) -> Path:
+    def export_badges_pdf(self, output_path: str | Path, snapshot=None) -> Path:
         """
         Génère un PDF contenant un badge par participant.
 
@@ -150,12 +153,12 @@ class ExportService:
         - Nom & prénom, métier, suffixe « (Invité) » si applicable
         - Table assignée pour chaque session, dans l'ordre
         """
-        persistence = self._require_persistence()
+        snap = self._snapshot(snapshot)
         output_path = Path(output_path)
 
-        event_info = persistence.get_event_info()
-        participants = list(persistence.list_participants())
-        plan = persistence.load_plan()
+        event_info = snap.event
+        participants = snap.participants
+        plan = snap.plan
 
         session_count = event_info.get("session_count") or 0
         session_count = max(session_count, len(plan)) if plan else session_count
@@ -177,6 +180,10 @@ class ExportService:
             raise RuntimeError("Persistence non fournie pour l'export")
         return self.persistence
 
+    def _snapshot(self, snapshot=None):
+        # une seule lecture (transaction) pour tout l'export
+        return snapshot if snapshot is not None else self._require_persistence().snapshot()
+
     def _resolve_logo_path(self) -> Path | None:
         if self.logo_path:
             return Path(self.logo_path)
@@ -1,16 +1,61 @@
 from __future__ import annotations
 
+import codecs
+import csv
 import unicodedata
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from openpyxl import load_workbook
 
 
+class _ExcelFrDialect(csv.excel):
+    # CSV « Excel français » : séparateur point-virgule (repli si la détection échoue)
+    delimiter = ";"
+
+
+@dataclass
+class SkippedRow:
+    line: int  # numéro de ligne dans le fichier (ou rang dans la saisie UI)
+    first_name: str
+    last_name: str
+    job: str
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    """Bilan du dernier import : participants ajoutés et lignes ignorées (doublons)."""
+    inserted: int = 0
+    skipped: list[SkippedRow] = field(default_factory=list)
+
+
+@dataclass
+class SyncReport:
+    """Bilan d'une synchronisation de la liste des participants."""
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    skipped: list[SkippedRow] = field(default_factory=list)
+
+
 class ImportService:
-    """Service d'import (Excel & UI)."""
+    """Service d'import (Excel, CSV & UI). Le bilan du dernier import est dans last_report."""
+
+    REASON_IN_FILE = "doublon dans le fichier"
+    REASON_IN_EVENT = "déjà inscrit"
 
     def __init__(self, persistence=None) -> None:
         self.persistence = persistence
+        self.last_report = ImportReport()
+
+    # lignes insérées par transaction pendant un import de fichier
+    IMPORT_CHUNK_SIZE = 500
+    # détection du format CSV
+    CSV_DELIMITERS = ";,\t|"
+    CSV_SNIFF_BYTES = 64 * 1024
 
     # --- public API ------------------------------------------------------
     def import_from_excel(self, file_path: str | Path) -> int:
@@ -22,42 +67,75 @@ class ImportService:
         - Métier
         - Visiteur (Oui/Non)
         - Chef de table (Oui/Non)
+
+        Le classeur est lu en flux (lecture seule, ligne par ligne) et les
+        participants sont insérés par paquets : mémoire constante, même pour
+        plusieurs milliers de lignes.
         """
 
         persistence = self._require_persistence()
-        wb = load_workbook(filename=file_path)
-        ws = wb.active
-
-        rows = list(ws.iter_rows(values_only=True))
-        if not rows:
-            return 0
+        self.last_report = ImportReport()
+        return self._insert_in_chunks(persistence, self._excel_participants(file_path))
 
-        header = [self._normalize_header(h) for h in rows[0]]
-        col_idx = self._map_columns(header)
+    def import_from_csv(self, file_path: str | Path) -> int:
+        """Importe les participants depuis un CSV/TSV (export de CRM, tableur…).
 
-        added = 0
-        for raw in rows[1:]:
-            if not raw or all(v is None or str(v).strip() == "" for v in raw):
-                continue
+        Mêmes colonnes que pour l'Excel. L'encodage (UTF-8 avec ou sans BOM,
+        sinon Windows-1252) et le séparateur (; , tabulation |) sont détectés.
+        Le fichier est lu en flux et inséré par paquets.
+        """
 
-            first = self._read_cell(raw, col_idx.get("first_name"))
-            last = self._read_cell(raw, col_idx.get("last_name"))
-            job = self._read_cell(raw, col_idx.get("job"))
-            guest = self._parse_bool(raw[col_idx["is_guest"]]) if col_idx.get("is_guest") is not None else False
-            lead = (
-                self._parse_bool(raw[col_idx["is_table_lead"]])
-                if col_idx.get("is_table_lead") is not None
-                else False
-            )
+        persistence = self._require_persistence()
+        self.last_report = ImportReport()
+        encoding = self._detect_encoding(file_path)
+        with open(file_path, newline="", encoding=encoding) as fh:
+            sample = fh.read(self.CSV_SNIFF_BYTES)
+            fh.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=self.CSV_DELIMITERS)
+            except csv.Error:
+                dialect = _ExcelFrDialect
+            rows = csv.reader(fh, dialect)
+            col_idx = self._read_header(rows)
 
-            if not first or not last or not job:
-                # ligne incomplète : on ignore
-                continue
+            return self._insert_in_chunks(persistence, self._participants_from_rows(rows, col_idx))
 
-            persistence.add_participant(first, last, job, guest, lead)
-            added += 1
+    def sync_from_excel(
+            self, file_path: str | Path, *, remove_missing: bool = False, dry_run: bool = False,
+    ) -> SyncReport:
+        """Synchronise la réunion avec un Excel mis à jour (voir sync_from_rows)."""
+        self._require_persistence()
+        return self._sync(self._excel_participants(file_path), remove_missing, dry_run)
 
-        return added
+    def sync_from_rows(
+            self, rows: Iterable[dict], *, remove_missing: bool = False, dry_run: bool = False,
+    ) -> SyncReport:
+        """
+        Synchronise les participants de la réunion avec une liste à jour, sans tout réimporter :
+        - les nouvelles personnes sont ajoutées
+        - les indicateurs visiteur / chef de table modifiés sont mis à jour
+        - remove_missing=True : les personnes absentes de la liste sont supprimées
+        Le plan est conservé ; seules les places des personnes supprimées en sont retirées.
+        dry_run=True : calcule seulement le bilan (rien n'est écrit), pour confirmation.
+        Une synchronisation qui supprimerait tous les participants est refusée (ValueError).
+        rows: dicts first_name, last_name, job et, optionnellement, is_guest / is_table_lead.
+        """
+        self._require_persistence()
+        numbered = (
+            (line, {
+                "first_name": str(row.get("first_name", "")).strip(),
+                "last_name": str(row.get("last_name", "")).strip(),
+                "job": str(row.get("job", "")).strip(),
+                "is_guest": bool(row.get("is_guest", False)),
+                "is_table_lead": bool(row.get("is_table_lead", False)),
+            })
+            for line, row in enumerate(rows, start=1)
+        )
+        return self._sync(
+            ((line, p) for line, p in numbered if p["first_name"] and p["last_name"] and p["job"]),
+            remove_missing,
+            dry_run,
+        )
 
     def import_from_ui(self, rows: list[dict]) -> int:
         """Importe des participants fournis par l'UI.
@@ -67,9 +145,10 @@ class ImportService:
         """
 
         persistence = self._require_persistence()
-        added = 0
+        self.last_report = ImportReport()
+        batch = []
 
-        for row in rows:
+        for line, row in enumerate(rows, start=1):
             first = str(row.get("first_name", "")).strip()
             last = str(row.get("last_name", "")).strip()
             job = str(row.get("job", "")).strip()
@@ -77,27 +156,195 @@ class ImportService:
                 continue
             is_guest = bool(row.get("is_guest", False))
             is_lead = bool(row.get("is_table_lead", False))
-            persistence.add_participant(first, last, job, is_guest, is_lead)
-            added += 1
+            batch.append((line, {
+                "first_name": first,
+                "last_name": last,
+                "job": job,
+                "is_guest": is_guest,
+                "is_table_lead": is_lead,
+            }))
 
-        return added
+        return self._insert_in_chunks(persistence, batch)
 
     # --- helpers ---------------------------------------------------------
+    def _excel_participants(self, file_path: str | Path) -> Iterator[tuple[int, dict]]:
+        """Lit l'Excel en flux (lecture seule) et produit (numéro de ligne, participant)."""
+        wb = load_workbook(filename=file_path, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            ws.reset_dimensions()  # certaines exportations déclarent une mauvaise plage
+            rows = ws.iter_rows(values_only=True)
+            col_idx = self._read_header(rows)
+
+            yield from self._participants_from_rows(rows, col_idx)
+        finally:
+            wb.close()
+
+    def _sync(
+            self, participants: Iterable[tuple[int, dict]], remove_missing: bool, dry_run: bool = False,
+    ) -> SyncReport:
+        persistence = self._require_persistence()
+        report = SyncReport()
+        # diff en une passe sur les clés d'identité normalisées (dict haché)
+        keyed = [(self._identity_key(p.first_name, p.last_name, p.job), p) for p in persistence.list_participants()]
+        current = dict(keyed)
+        seen: set[tuple[str, str, str]] = set()
+        added: list[dict] = []
+        updated: list[dict] = []
+        for line, participant in participants:
+            key = self._identity_key(participant["first_name"], participant["last_name"], participant["job"])
+            if key in seen:
+                report.skipped.append(SkippedRow(
+                    line=line,
+                    first_name=participant["first_name"],
+                    last_name=participant["last_name"],
+                    job=participant["job"],
+                    reason=self.REASON_IN_FILE,
+                ))
+                continue
+            seen.add(key)
+            existing = current.get(key)
+            if existing is None:
+                added.append(participant)
+            elif (bool(existing.is_guest), bool(existing.is_table_lead)) != (
+                    participant["is_guest"], participant["is_table_lead"]):
+                updated.append({
+                    "id": existing.id,
+                    "is_guest": participant["is_guest"],
+                    "is_table_lead": participant["is_table_lead"],
+                })
+            else:
+                report.unchanged += 1
+        removed = [p.id for key, p in keyed if key not in seen] if remove_missing else []
+        if removed and len(removed) == len(keyed) and not dry_run:
+            # liste vide ou sans aucune personne connue : sûrement le mauvais fichier
+            raise ValueError(
+                f"La synchronisation supprimerait les {len(keyed)} participant(s) de la réunion : "
+                "aucune personne du fichier n'est déjà inscrite. Synchronisation annulée."
+            )
+
+        if not dry_run:
+            persistence.apply_participant_sync(added=added, updated=updated, removed=removed)
+        report.added, report.updated, report.removed = len(added), len(updated), len(removed)
+        return report
+
+    def _participants_from_rows(self, rows: Iterable[tuple], col_idx: dict[str, int]) -> Iterator[tuple[int, dict]]:
+        """
+        Convertit paresseusement les lignes brutes en (numéro de ligne, participant) ;
+        lignes vides/incomplètes ignorées. La ligne 1 est l'en-tête.
+        """
+        for line, raw in enumerate(rows, start=2):
+            if not raw or all(v is None or str(v).strip() == "" for v in raw):
+                continue
+
+            first = self._read_cell(raw, col_idx.get("first_name"))
+            last = self._read_cell(raw, col_idx.get("last_name"))
+            job = self._read_cell(raw, col_idx.get("job"))
+            guest = self._parse_bool(self._cell(raw, col_idx.get("is_guest")))
+            lead = self._parse_bool(self._cell(raw, col_idx.get("is_table_lead")))
+
+            if not first or not last or not job:
+                # ligne incomplète : on ignore
+                continue
+
+            yield line, {
+                "first_name": first,
+                "last_name": last,
+                "job": job,
+                "is_guest": guest,
+                "is_table_lead": lead,
+            }
+
+    def _insert_in_chunks(self, persistence, participants: Iterable[tuple[int, dict]]) -> int:
+        """
+        Filtre les doublons en mémoire puis insère par paquets de IMPORT_CHUNK_SIZE
+        (une transaction chacun). Le bilan est conservé dans self.last_report.
+        """
+        report = ImportReport()
+        self.last_report = report
+        chunk: list[dict] = []
+        for participant in self._without_duplicates(persistence, participants, report):
+            chunk.append(participant)
+            if len(chunk) >= self.IMPORT_CHUNK_SIZE:
+                report.inserted += persistence.add_participants_bulk(chunk, on_conflict="skip").inserted
+                chunk = []
+        if chunk:
+            report.inserted += persistence.add_participants_bulk(chunk, on_conflict="skip").inserted
+        return report.inserted
+
+    def _without_duplicates(self, persistence, participants, report: ImportReport) -> Iterator[dict]:
+        # clés d'identité de la réunion chargées une fois, normalisées comme les en-têtes
+        known = {
+            self._identity_key(p.first_name, p.last_name, p.job)
+            for p in persistence.list_participants()
+        }
+        in_file: set[tuple[str, str, str]] = set()
+        for line, participant in participants:
+            key = self._identity_key(participant["first_name"], participant["last_name"], participant["job"])
+            reason = None
+            if key in known:
+                reason = self.REASON_IN_EVENT
+            elif key in in_file:
+                reason = self.REASON_IN_FILE
+            if reason:
+                report.skipped.append(SkippedRow(
+                    line=line,
+                    first_name=participant["first_name"],
+                    last_name=participant["last_name"],
+                    job=participant["job"],
+                    reason=reason,
+                ))
+                continue
+            in_file.add(key)
+            yield participant
+
+    def _identity_key(self, first_name, last_name, job) -> tuple[str, str, str]:
+        return self._normalize_text(first_name), self._normalize_text(last_name), self._normalize_text(job)
+
     def _require_persistence(self):
         if not self.persistence:
             raise RuntimeError("Persistence non fournie pour l'import")
         return self.persistence
 
-    def _normalize_header(self, value) -> str:
+    def _detect_encoding(self, file_path: str | Path) -> str:
+        """UTF-8 avec BOM, UTF-8, sinon Windows-1252 (exports Excel/CRM sous Windows)."""
+        with open(file_path, "rb") as fh:
+            head = fh.read(4)
+            if head.startswith(codecs.BOM_UTF8):
+                return "utf-8-sig"
+            if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+                return "utf-16"
+            fh.seek(0)
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            try:
+                for block in iter(lambda: fh.read(64 * 1024), b""):
+                    decoder.decode(block)
+                decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                return "cp1252"
+        return "utf-8"
+
+    def _normalize_text(self, value) -> str:
+        # minuscules, sans accents, espaces multiples réduits
         if value is None:
             return ""
-        text = str(value).strip().lower()
-        text = "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+        text = " ".join(str(value).split()).lower()
+        return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+
+    def _normalize_header(self, value) -> str:
+        text = self._normalize_text(value)
         # Ignore additional hints such as "(oui/non)" that may appear in the header
         if "(" in text:
             text = text.split("(", 1)[0].strip()
         return text
 
+    def _read_header(self, rows: Iterator[tuple]) -> dict[str, int]:
+        # première ligne = en-tête ; un fichier vide est une erreur, pas une liste vide
+        first = next(rows, None)
+        if first is None:
+            raise ValueError("Fichier vide : ligne d'en-tête introuvable")
+        return self._map_columns([self._normalize_header(h) for h in first])
+
     def _map_columns(self, header: list[str]) -> dict[str, int]:
         mapping = {
             "first_name": {"prenom", "first_name"},
@@ -109,11 +356,11 @@ class ImportService:
 
         idx = {key: None for key in mapping}
         for i, col in enumerate(header):
-            for field, names in mapping.items():
+            for key, names in mapping.items():
                 if col.replace(" ", "") in names:
-                    idx[field] = i
+                    idx[key] = i
         if idx["first_name"] is None or idx["last_name"] is None or idx["job"] is None:
-            raise ValueError("Colonnes obligatoires manquantes dans l'Excel")
+            raise ValueError("Colonnes obligatoires manquantes dans le fichier")
         return idx
 
     def _parse_bool(self, value) -> bool:
@@ -130,8 +377,12 @@ class ImportService:
             return False
         return False
 
+    def _cell(self, row: tuple, index: int | None):
+        # les lignes lues en flux peuvent être plus courtes que l'en-tête
+        if index is None or index >= len(row):
+            return None
+        return row[index]
+
     def _read_cell(self, row: tuple, index: int | None) -> str:
-        if index is None:
-            return ""
-        value = row[index]
+        value = self._cell(row, index)
         return "" if value is None else str(value).strip()
@@ -1,39 +1,105 @@
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterable, Optional
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+from dataclasses import dataclass, field
 from datetime import datetime
 from contextlib import contextmanager
 
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, insert, literal, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from msb.infra.db import Base, make_engine, make_session_factory
-from msb.infra.models_orm import EventORM, ParticipantORM, SeatingORM
+from msb.infra.db import (
+    Base,
+    DEFAULT_SQLITE_PROFILE,
+    EngineRegistry,
+    engine_registry,
+    make_session_factory,
+    upgrade_schema,
+)
+from msb.infra import plan_codec
+from msb.infra.models_orm import EventORM, ParticipantORM, SeatingBlobORM, SeatingORM
+
+# formats d'enregistrement du plan : une ligne par siège ("rows", lisible par les
+# anciennes versions) ou un blob compact par session ("packed", voir plan_codec)
+PLAN_STORAGES = ("rows", "packed")
+
+PARTICIPANT_CONFLICTS = ("skip", "update", "error")
+
+
+@dataclass(frozen=True)
+class BulkInsertResult:
+    """Bilan d'un ajout groupé de participants."""
+    inserted: int = 0
+    skipped: int = 0
+    updated: int = 0    # mode "update" : indicateurs réellement modifiés
+    unchanged: int = 0  # mode "update" : ligne identique à la base
+
+
+@dataclass(frozen=True)
+class EventSnapshot:
+    """Vue figée de la réunion courante (paramètres, participants, plan, chefs), lue en une transaction."""
+    event: Mapping[str, object]
+    participants: tuple[ParticipantORM, ...]
+    plan: tuple[tuple[tuple[int, ...], ...], ...]
+    leads: int
+    total_tables: int
+    participants_by_id: Mapping[int, ParticipantORM] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "participants_by_id", MappingProxyType({p.id: p for p in self.participants}))
+
+    def plan_lists(self) -> list[list[list[int]]]:
+        """Copie modifiable du plan (plan[session][table] = [ids])."""
+        return [[list(t) for t in tables] for tables in self.plan]
 
 class Persistence:
     """
     Une façade simple pour piloter la réunion courante.
     - new_event(db_path, name, start, end) → crée la BD + l'événement 1
-    - open_event(db_path) → ouvre une BD existante et charge l'événement 1 (ou le dernier)
+    - open_event(db_path, event_id=None) → ouvre une BD existante et charge l'événement demandé (ou le dernier)
+    - list_events / switch_event / clone_event → archive de plusieurs réunions dans un fichier
     - close_event() → ferme le contexte
     - CRUD participants
     - MAJ paramètres (tables, sessions, durées, transitions)
-    - save_plan / load_plan
+    - snapshot() : vue figée de la réunion en une transaction
+    - save_plan / load_plan (format "rows" ou "packed", convert_plan_storage)
     """
 
-    def __init__(self) -> None:
+    def __init__(
+            self,
+            sqlite_profile: str = DEFAULT_SQLITE_PROFILE,
+            plan_storage: str = "rows",
+            engines: EngineRegistry | None = None,
+    ) -> None:
+        if plan_storage not in PLAN_STORAGES:
+            raise ValueError(f"Format de plan inconnu : {plan_storage!r}")
+        self.sqlite_profile = sqlite_profile
+        self.plan_storage = plan_storage
+        # moteurs réutilisés entre ouvertures/fermetures des fichiers de réunion
+        self.engines = engines if engines is not None else engine_registry
         self.db_path: Optional[Path] = None
         self.engine = None
         self.Session = None
         self.event_id: Optional[int] = None
+        # cache des participants : (génération, liste ordonnée, dict par id)
+        self._generation = 0
+        self._participants_cache = None
 
     # --- utils
+    def _touch(self):
+        """Invalide les caches en mémoire (à appeler après toute écriture sur les participants)."""
+        self._generation += 1
+        self._participants_cache = None
+
     def _require(self):
         if not self.Session or not self.event_id:
             raise RuntimeError("Aucune réunion ouverte")
 
     @contextmanager
-    def session_scope(self):
+    def session_scope(self, touch: bool = False):
+        """touch=True pour une écriture sur les participants : les caches sont invalidés en sortie."""
         if not self.Session:
             raise RuntimeError("BD non initialisée")
         s = self.Session()
@@ -45,12 +111,21 @@ class Persistence:
             raise
         finally:
             s.close()
+            if touch:
+                self._touch()
 
     # --- lifecycle
-    def new_event(self, db_path: Path, name: str, start: datetime, end: datetime):
+    def _attach(self, db_path: Path):
+        # changement de fichier : on libère les connexions de l'ancien avant de passer au nouveau
+        if self.db_path is not None and Path(self.db_path).resolve() != Path(db_path).resolve():
+            self.engines.release(self.db_path, self.sqlite_profile)
+        self._touch()
         self.db_path = db_path
-        self.engine = make_engine(db_path)
+        self.engine = self.engines.get(db_path, self.sqlite_profile)
         self.Session = make_session_factory(self.engine)
+
+    def new_event(self, db_path: Path, name: str, start: datetime, end: datetime):
+        self._attach(db_path)
         Base.metadata.create_all(self.engine)
 
         with self.session_scope() as s:
@@ -60,19 +135,99 @@ class Persistence:
             self.event_id = evt.id
         return self.event_id
 
-    def open_event(self, db_path: Path):
-        self.db_path = db_path
-        self.engine = make_engine(db_path)
-        self.Session = make_session_factory(self.engine)
-        # pas de create_all ici; on suppose BD déjà créée
+    def open_event(self, db_path: Path, event_id: Optional[int] = None):
+        """Ouvre la réunion event_id du fichier (par défaut la dernière créée)."""
+        self._attach(db_path)
+        # BD supposée déjà créée : on ajoute seulement les index/tables apparus depuis
+        upgrade_schema(self.engine)
         with self.session_scope() as s:
-            evt_id = s.scalar(select(EventORM.id).order_by(EventORM.id.desc()))
+            if event_id is None:
+                evt_id = s.scalar(select(EventORM.id).order_by(EventORM.id.desc()).limit(1))
+            else:
+                evt_id = s.scalar(select(EventORM.id).where(EventORM.id == int(event_id)))
             if not evt_id:
                 raise RuntimeError("Aucun événement trouvé dans cette base.")
             self.event_id = evt_id
         return self.event_id
 
+    # --- archive (plusieurs réunions dans un même fichier)
+    def list_events(self, offset: int = 0, limit: int = 50) -> list[dict]:
+        """Réunions du fichier ouvert, de la plus récente à la plus ancienne (index sur date_start)."""
+        if not self.Session:
+            raise RuntimeError("BD non initialisée")
+        with self.session_scope() as s:
+            rows = s.execute(
+                select(EventORM.id, EventORM.name, EventORM.date_start, EventORM.date_end)
+                .order_by(EventORM.date_start.desc(), EventORM.id.desc())
+                .offset(max(0, int(offset)))
+                .limit(max(0, int(limit)))
+            ).all()
+        return [
+            {"id": r.id, "name": r.name, "date_start": r.date_start, "date_end": r.date_end}
+            for r in rows
+        ]
+
+    def count_events(self) -> int:
+        if not self.Session:
+            raise RuntimeError("BD non initialisée")
+        with self.session_scope() as s:
+            return s.scalar(select(func.count()).select_from(EventORM)) or 0
+
+    def switch_event(self, event_id: int):
+        """Passe à une autre réunion du même fichier, sans le rouvrir."""
+        if not self.Session:
+            raise RuntimeError("BD non initialisée")
+        with self.session_scope() as s:
+            evt_id = s.scalar(select(EventORM.id).where(EventORM.id == int(event_id)))
+        if not evt_id:
+            raise RuntimeError("Aucun événement trouvé dans cette base.")
+        self._touch()
+        self.event_id = evt_id
+        return self.event_id
+
+    def clone_event(self, name: str, start: datetime, end: datetime) -> int:
+        """
+        Crée dans le même fichier une réunion reprenant les participants et paramètres
+        de la réunion courante (sans le plan), puis bascule dessus.
+        """
+        self._require()
+        with self.session_scope() as s:
+            src = s.get(EventORM, self.event_id)
+            evt = EventORM(
+                name=name,
+                date_start=start,
+                date_end=end,
+                num_tables=src.num_tables,
+                table_capacity_min=src.table_capacity_min,
+                table_capacity_max=src.table_capacity_max,
+                session_count=src.session_count,
+                session_duration_minutes=src.session_duration_minutes,
+                transition_minutes=src.transition_minutes,
+                rule_priority=src.rule_priority,
+                pause_count=src.pause_count,
+                pause_minutes=src.pause_minutes,
+            )
+            s.add(evt)
+            s.flush()
+            # copie des participants en une requête INSERT ... SELECT
+            cols = ["first_name", "last_name", "job", "is_guest", "is_table_lead"]
+            s.execute(
+                insert(ParticipantORM).from_select(
+                    ["event_id", *cols],
+                    select(literal(evt.id), *(getattr(ParticipantORM, c) for c in cols))
+                    .where(ParticipantORM.event_id == self.event_id),
+                )
+            )
+            new_id = evt.id
+        self._touch()
+        self.event_id = new_id
+        return new_id
+
     def close_event(self):
+        self._touch()
+        if self.db_path is not None:
+            # libère connexions et verrous du fichier ; le moteur reste en cache pour une réouverture
+            self.engines.release(self.db_path, self.sqlite_profile)
         self.db_path = None
         self.engine = None
         self.Session = None
@@ -82,21 +237,44 @@ class Persistence:
     def get_event_info(self):
         self._require()
         with self.session_scope() as s:
-            evt = s.get(EventORM, self.event_id)
-            return {
-                "id": evt.id,
-                "name": evt.name,
-                "date_start": evt.date_start,
-                "date_end": evt.date_end,
-                "num_tables": evt.num_tables,
-                "cap_min": evt.table_capacity_min,
-                "cap_max": evt.table_capacity_max,
-                "session_count": evt.session_count,
-                "dur": evt.session_duration_minutes,
-                "trans": evt.transition_minutes,
-                "pause_count": evt.pause_count or 0,
-                "pause_minutes": evt.pause_minutes or 0,
-            }
+            return self._event_info(s)
+
+    def _event_info(self, s) -> dict:
+        evt = s.get(EventORM, self.event_id)
+        return {
+            "id": evt.id,
+            "name": evt.name,
+            "date_start": evt.date_start,
+            "date_end": evt.date_end,
+            "num_tables": evt.num_tables,
+            "cap_min": evt.table_capacity_min,
+            "cap_max": evt.table_capacity_max,
+            "session_count": evt.session_count,
+            "dur": evt.session_duration_minutes,
+            "trans": evt.transition_minutes,
+            "pause_count": evt.pause_count or 0,
+            "pause_minutes": evt.pause_minutes or 0,
+        }
+
+    def snapshot(self) -> EventSnapshot:
+        """
+        Lit en une seule transaction tout ce dont l'interface et les exports ont besoin :
+        paramètres de la réunion, participants, plan et nombre de chefs de table.
+        """
+        self._require()
+        with self.session_scope() as s:
+            # transaction de lecture explicite : les SELECT voient tous le même état de la base
+            s.connection().exec_driver_sql("BEGIN")
+            info = self._event_info(s)
+            participants, _ = self._participants(s)
+            plan = self._read_plan(s)
+        return EventSnapshot(
+            event=MappingProxyType(info),
+            participants=participants,
+            plan=tuple(tuple(tuple(t) for t in tables) for tables in plan),
+            leads=sum(1 for p in participants if p.is_table_lead),
+            total_tables=info["num_tables"] or 0,
+        )
 
     def update_event_params(self, *, num_tables=None, cap_min=None, cap_max=None, session_count=None, dur=None,
                             trans=None,
@@ -115,14 +293,48 @@ class Persistence:
 
     # --- participants
     def list_participants(self):
+        """Participants triés par nom puis prénom (lus en base une fois par génération)."""
+        return list(self._participants()[0])
+
+    def participants_by_id(self) -> Mapping[int, ParticipantORM]:
+        """Vue en lecture seule {id: participant}, servie par le même cache."""
+        return MappingProxyType(self._participants()[1])
+
+    def participant_count(self) -> int:
         self._require()
+        cached = self._participants_cache
+        if cached is not None and cached[0] == self._generation:
+            return len(cached[1])
         with self.session_scope() as s:
-            rows = s.scalars(select(ParticipantORM).where(ParticipantORM.event_id == self.event_id).order_by(ParticipantORM.last_name, ParticipantORM.first_name)).all()
-            return rows
+            return s.scalar(
+                select(func.count())
+                .select_from(ParticipantORM)
+                .where(ParticipantORM.event_id == self.event_id)
+            ) or 0
+
+    def _participants(self, s=None):
+        self._require()
+        cached = self._participants_cache
+        if cached is not None and cached[0] == self._generation:
+            return cached[1], cached[2]
+        generation = self._generation
+        if s is None:
+            with self.session_scope() as s:
+                rows = self._query_participants(s)
+        else:
+            rows = self._query_participants(s)
+        ordered = tuple(rows)
+        by_id = {p.id: p for p in ordered}
+        if generation == self._generation:
+            self._participants_cache = (generation, ordered, by_id)
+        return ordered, by_id
+
+    def _query_participants(self, s):
+        return s.scalars(select(ParticipantORM).where(ParticipantORM.event_id == self.event_id).order_by(ParticipantORM.last_name, ParticipantORM.first_name)).all()
 
     def add_participant(self, first_name: str, last_name: str, job: str, is_guest: bool, is_table_lead: bool):
         self._require()
-        with self.session_scope() as s:
+        with self.session_scope(touch=True) as s:
             p = ParticipantORM(
                 event_id=self.event_id,
                 first_name=first_name.strip(),
@@ -135,25 +347,193 @@ class Persistence:
             s.flush()
             return p.id
 
+    def add_participants_bulk(self, rows: Iterable[dict], on_conflict: str = "skip") -> BulkInsertResult:
+        """
+        Ajoute des participants en une seule transaction (INSERT ... ON CONFLICT).
+        rows: dicts avec first_name, last_name, job et, optionnellement, is_guest / is_table_lead.
+        on_conflict (même prénom + nom + métier déjà présent, en base ou plus haut dans rows) :
+        - "skip"   : la ligne est ignorée
+        - "update" : visiteur / chef de table sont mis à jour (les lignes identiques
+          à la base sont comptées dans unchanged, pas dans updated)
+        - "error"  : IntegrityError, rien n'est ajouté
+        """
+        self._require()
+        if on_conflict not in PARTICIPANT_CONFLICTS:
+            raise ValueError(f"Mode de conflit inconnu : {on_conflict!r}")
+        values = [
+            {
+                "event_id": self.event_id,
+                "first_name": str(r.get("first_name", "")).strip(),
+                "last_name": str(r.get("last_name", "")).strip(),
+                "job": str(r.get("job", "")).strip(),
+                "is_guest": bool(r.get("is_guest", False)),
+                "is_table_lead": bool(r.get("is_table_lead", False)),
+            }
+            for r in rows
+        ]
+        if not values:
+            return BulkInsertResult()
+
+        with self.session_scope(touch=True) as s:
+            stmt = sqlite_insert(ParticipantORM)
+            if on_conflict == "error":
+                s.execute(stmt, values)
+                return BulkInsertResult(inserted=len(values))
+
+            # indicateurs déjà connus (base + lignes précédentes) pour ventiler le bilan
+            flags = {
+                (first, last, job): (bool(guest), bool(lead))
+                for first, last, job, guest, lead in s.execute(
+                    select(
+                        ParticipantORM.first_name, ParticipantORM.last_name, ParticipantORM.job,
+                        ParticipantORM.is_guest, ParticipantORM.is_table_lead,
+                    ).where(ParticipantORM.event_id == self.event_id)
+                )
+            }
+            inserted = updated = 0
+            for v in values:
+                key = (v["first_name"], v["last_name"], v["job"])
+                new_flags = (v["is_guest"], v["is_table_lead"])
+                old_flags = flags.get(key)
+                if old_flags is None:
+                    inserted += 1
+                    flags[key] = new_flags
+                elif on_conflict == "update" and old_flags != new_flags:
+                    updated += 1
+                    flags[key] = new_flags
+
+            identity = ["event_id", "first_name", "last_name", "job"]
+            if on_conflict == "skip":
+                stmt = stmt.on_conflict_do_nothing(index_elements=identity)
+            else:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=identity,
+                    set_={
+                        "is_guest": stmt.excluded.is_guest,
+                        "is_table_lead": stmt.excluded.is_table_lead,
+                    },
+                )
+            s.execute(stmt, values)
+
+        others = len(values) - inserted
+        if on_conflict == "skip":
+            return BulkInsertResult(inserted=inserted, skipped=others)
+        return BulkInsertResult(inserted=inserted, updated=updated, unchanged=others - updated)
+
+    def apply_participant_sync(
+            self,
+            *,
+            added: Iterable[dict] = (),
+            updated: Iterable[dict] = (),
+            removed: Iterable[int] = (),
+    ) -> None:
+        """
+        Applique en une transaction le diff d'une liste de participants :
+        - added   : nouveaux participants (dicts comme pour add_participants_bulk)
+        - updated : {"id", "is_guest", "is_table_lead"} des participants dont les indicateurs changent
+        - removed : ids à supprimer ; seules leurs places dans le plan sont retirées
+        """
+        self._require()
+        added = [
+            {
+                "event_id": self.event_id,
+                "first_name": str(r["first_name"]).strip(),
+                "last_name": str(r["last_name"]).strip(),
+                "job": str(r["job"]).strip(),
+                "is_guest": bool(r.get("is_guest", False)),
+                "is_table_lead": bool(r.get("is_table_lead", False)),
+            }
+            for r in added
+        ]
+        updated = [
+            {"id": int(r["id"]), "is_guest": bool(r["is_guest"]), "is_table_lead": bool(r["is_table_lead"])}
+            for r in updated
+        ]
+        removed = sorted({int(pid) for pid in removed})
+        if not (added or updated or removed):
+            return
+        with self.session_scope(touch=True) as s:
+            if added:
+                s.execute(
+                    sqlite_insert(ParticipantORM).on_conflict_do_nothing(
+                        index_elements=["event_id", "first_name", "last_name", "job"]
+                    ),
+                    added,
+                )
+            if updated:
+                # UPDATE groupé par clé primaire (executemany)
+                s.execute(update(ParticipantORM), updated)
+            for i in range(0, len(removed), self.DELETE_CHUNK_SIZE):
+                chunk = removed[i:i + self.DELETE_CHUNK_SIZE]
+                s.execute(delete(SeatingORM).where(
+                    SeatingORM.event_id == self.event_id,
+                    SeatingORM.participant_id.in_(chunk),
+                ))
+                s.execute(delete(ParticipantORM).where(
+                    ParticipantORM.event_id == self.event_id,
+                    ParticipantORM.id.in_(chunk),
+                ))
+            if removed:
+                self._strip_from_blobs(s, set(removed))
+
     def update_participant(self, pid: int, **fields):
         self._require()
-        with self.session_scope() as s:
+        with self.session_scope(touch=True) as s:
             p = s.get(ParticipantORM, pid)
             if not p: return
             for k, v in fields.items():
                 setattr(p, k, v)
 
     def remove_participant(self, pid: int):
+        self.remove_participants([pid])
+
+    # paramètres SQL par requête IN (...) : sous la limite des anciennes versions de SQLite (999)
+    DELETE_CHUNK_SIZE = 500
+
+    def remove_participants(self, pids: Iterable[int]) -> int:
+        """
+        Supprime plusieurs participants (et leurs places dans le plan) en une transaction.
+        Renvoie le nombre de participants supprimés.
+        """
         self._require()
-        with self.session_scope() as s:
-            s.execute(
-                delete(SeatingORM).where(
-                    SeatingORM.event_id == self.event_id,
-                    SeatingORM.participant_id == pid,
+        ids = sorted({int(pid) for pid in pids})
+        if not ids:
+            return 0
+        removed = 0
+        with self.session_scope(touch=True) as s:
+            for i in range(0, len(ids), self.DELETE_CHUNK_SIZE):
+                chunk = ids[i:i + self.DELETE_CHUNK_SIZE]
+                s.execute(
+                    delete(SeatingORM).where(
+                        SeatingORM.event_id == self.event_id,
+                        SeatingORM.participant_id.in_(chunk),
+                    )
                 )
+                removed += s.execute(
+                    delete(ParticipantORM).where(
+                        ParticipantORM.event_id == self.event_id,
+                        ParticipantORM.id.in_(chunk),
+                    )
+                ).rowcount
+            self._strip_from_blobs(s, set(ids))
+        return removed
+
+    def _strip_from_blobs(self, s, pids: set[int]):
+        # plan au format compact : on retire les personnes des sessions qui les contiennent
+        blobs = s.execute(
+            select(SeatingBlobORM.id, SeatingBlobORM.data)
+            .where(SeatingBlobORM.event_id == self.event_id)
+        ).all()
+        for blob_id, data in blobs:
+            tables = plan_codec.decode_session(data)
+            if not any(pid in pids for t in tables for pid in t):
+                continue
+            tables = [[pid for pid in t if pid not in pids] for t in tables]
+            s.execute(
+                update(SeatingBlobORM)
+                .where(SeatingBlobORM.id == blob_id)
+                .values(data=plan_codec.encode_session(tables))
             )
-            p = s.get(ParticipantORM, pid)
-            if p: s.delete(p)
 
     def count_leads(self) -> tuple[int, int]:
         self._require()
@@ -166,37 +546,126 @@ class Persistence:
                     ParticipantORM.is_table_lead == True,
                 )
             ) or 0
-        total_tables = self.get_event_info()["num_tables"] or 0
+            total_tables = s.scalar(select(EventORM.num_tables).where(EventORM.id == self.event_id)) or 0
         return leads, total_tables
 
     # --- plan
-    def save_plan(self, plan: list[list[list[int]]]):
-        """plan[session][table] = [participant_id, ...]"""
+    def save_plan(self, plan: Iterable[list[list[int]]], *, from_session: int = 0):
+        """
+        plan[session][table] = [participant_id, ...]
+        Accepte aussi un itérable de sessions (ex. Planner.build_plan_iter):
+        chaque session est écrite dès qu'elle est produite, dans la même transaction.
+        from_session: les sessions d'indice inférieur sont conservées telles quelles en base
+        (re-planification après les sessions déjà tenues); seules les suivantes sont réécrites.
+        Le plan est écrit au format self.plan_storage ("rows" ou "packed").
+        """
         self._require()
         with self.session_scope() as s:
-            s.execute(delete(SeatingORM).where(SeatingORM.event_id == self.event_id))
-            for s_idx, tables in enumerate(plan):
-                for t_idx, pids in enumerate(tables):
-                    for pid in pids:
-                        s.add(SeatingORM(
-                            event_id=self.event_id,
-                            session_index=s_idx,
-                            table_index=t_idx,
-                            participant_id=int(pid),
-                        ))
+            stored = self._stored_plan_format(s)
+            if from_session > 0 and stored not in (None, self.plan_storage):
+                # sessions conservées encore dans l'autre format : on les convertit d'abord
+                kept = self._read_plan(s)[:from_session]
+                self._delete_plan(s)
+                self._insert_sessions(s, enumerate(kept), self.plan_storage)
+            self._delete_plan(s, from_session)
+            self._insert_sessions(
+                s,
+                ((s_idx, tables) for s_idx, tables in enumerate(plan) if s_idx >= from_session),
+                self.plan_storage,
+            )
 
     def load_plan(self) -> list[list[list[int]]]:
+        """Relit le plan, quel que soit le format dans lequel il a été enregistré."""
+        self._require()
+        with self.session_scope() as s:
+            return self._read_plan(s)
+
+    def convert_plan_storage(self, storage: str):
+        """Réécrit le plan de la réunion courante au format demandé ("rows" ou "packed")."""
         self._require()
+        if storage not in PLAN_STORAGES:
+            raise ValueError(f"Format de plan inconnu : {storage!r}")
         with self.session_scope() as s:
-            rows = s.scalars(select(SeatingORM).where(SeatingORM.event_id == self.event_id)).all()
-        if not rows:
-            return []
-        # reconstruire SxT
-        S = max(r.session_index for r in rows) + 1
-        T = max(r.table_index for r in rows) + 1
-        plan = [[[] for _ in range(T)] for __ in range(S)]
-        for r in rows:
-            plan[r.session_index][r.table_index].append(r.participant_id)
+            if self._stored_plan_format(s) in (None, storage):
+                return
+            plan = self._read_plan(s)
+            self._delete_plan(s)
+            self._insert_sessions(s, enumerate(plan), storage)
+
+    def _stored_plan_format(self, s) -> Optional[str]:
+        if s.scalar(select(SeatingBlobORM.id).where(SeatingBlobORM.event_id == self.event_id).limit(1)):
+            return "packed"
+        if s.scalar(select(SeatingORM.id).where(SeatingORM.event_id == self.event_id).limit(1)):
+            return "rows"
+        return None
+
+    def _delete_plan(self, s, from_session: int = 0):
+        s.execute(delete(SeatingORM).where(
+            SeatingORM.event_id == self.event_id,
+            SeatingORM.session_index >= from_session,
+        ))
+        s.execute(delete(SeatingBlobORM).where(
+            SeatingBlobORM.event_id == self.event_id,
+            SeatingBlobORM.session_index >= from_session,
+        ))
+
+    def _insert_sessions(self, s, sessions: Iterable[tuple[int, list[list[int]]]], storage: str):
+        if storage == "packed":
+            stmt = insert(SeatingBlobORM)
+            for s_idx, tables in sessions:
+                s.execute(stmt, [{
+                    "event_id": self.event_id,
+                    "session_index": s_idx,
+                    "format_version": plan_codec.FORMAT_VERSION,
+                    "data": plan_codec.encode_session(tables),
+                }])
+            return
+        # insertion Core en executemany, une session à la fois (pas d'objets ORM par siège)
+        stmt = insert(SeatingORM)
+        for s_idx, tables in sessions:
+            rows = [
+                {
+                    "event_id": self.event_id,
+                    "session_index": s_idx,
+                    "table_index": t_idx,
+                    "participant_id": int(pid),
+                }
+                for t_idx, pids in enumerate(tables)
+                for pid in pids
+            ]
+            if rows:
+                s.execute(stmt, rows)
+
+    def _read_plan(self, s) -> list[list[list[int]]]:
+        plan: list[list[list[int]]] = []
+        blobs = s.execute(
+            select(SeatingBlobORM.session_index, SeatingBlobORM.data)
+            .where(SeatingBlobORM.event_id == self.event_id)
+            .order_by(SeatingBlobORM.session_index)
+        ).all()
+        if blobs:
+            for s_idx, data in blobs:
+                while len(plan) < s_idx:
+                    plan.append([])
+                plan.append(plan_codec.decode_session(data))
+        else:
+            rows = s.execute(
+                select(SeatingORM.session_index, SeatingORM.table_index, SeatingORM.participant_id)
+                .where(SeatingORM.event_id == self.event_id)
+                .order_by(SeatingORM.session_index, SeatingORM.table_index, SeatingORM.id)
+            )
+            # une seule passe : les lignes arrivent triées, on agrandit le plan au fil de l'eau
+            for s_idx, t_idx, pid in rows:
+                while len(plan) <= s_idx:
+                    plan.append([])
+                tables = plan[s_idx]
+                while len(tables) <= t_idx:
+                    tables.append([])
+                tables[t_idx].append(pid)
+        # même nombre de tables pour chaque session (tables vides comprises)
+        T = max((len(tables) for tables in plan), default=0)
+        for tables in plan:
+            tables.extend([] for _ in range(T - len(tables)))
         return plan
 
     def update_event_general(self, *, name=None, date_start=None, date_end=None):
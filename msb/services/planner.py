@@ -1,7 +1,368 @@
 from __future__ import annotations
+import math
+import multiprocessing
+import os
+import queue
 import random
-from collections import defaultdict
-from typing import List, Dict, Set, Tuple
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+try:  # NumPy est optionnel: sans lui, on reste sur le moteur Python pur
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+
+class PlanningCancelled(Exception):
+    """Levée quand la génération est annulée via un CancellationToken."""
+
+
+class CancellationToken:
+    """Drapeau d'annulation partagé entre l'appelant (ex. thread UI) et le planner."""
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise PlanningCancelled()
+
+
+@dataclass(frozen=True)
+class PlanScore:
+    """Qualité d'un plan; comparer via key() (plus petit = meilleur)."""
+    repeated_pairs: int  # paires qui se rencontrent plus d'une fois
+    retable_visits: int  # retours d'un rotatif à une table déjà visitée
+    never_met: int       # paires qui ne se rencontrent jamais
+
+    def key(self) -> Tuple[int, int, int]:
+        return self.repeated_pairs, self.retable_visits, self.never_met
+
+
+# progress(étapes faites, étapes totales, meilleur score connu ou None)
+ProgressCallback = Callable[[int, int, "PlanScore | None"], None]
+
+
+@dataclass(frozen=True)
+class ImprovementStats:
+    initial: PlanScore
+    final: PlanScore
+    iterations: int
+    accepted_swaps: int
+    elapsed: float  # secondes
+
+
+@dataclass(frozen=True)
+class MultiStartResult:
+    """Meilleur plan d'un multi-départ; seed + improve_iterations suffisent à le reproduire."""
+    plan: List[List[List[int]]]
+    seed: int
+    score: PlanScore
+    improve_iterations: int
+    runs: int  # départs effectivement terminés dans le budget
+
+
+def _run_start(planner: "Planner", params: dict, seed: int, improve_iterations: int):
+    """Un départ du multi-départ (fonction de module pour être picklable)."""
+    plan, score = planner.build_improved_plan(**params, seed=seed, improve_iterations=improve_iterations)
+    return seed, plan, score
+
+
+def score_plan(plan: List[List[List[int]]], fixed_leads: Iterable[int] = ()) -> PlanScore:
+    """Évalue un plan plan[s][t] = [pids...]; les chefs fixes ne comptent pas en re-table."""
+    leads = set(fixed_leads)
+    people = sorted({pid for tables in plan for ppl in tables for pid in ppl})
+    n = len(people)
+    pair_counts: dict[Tuple[int, int], int] = {}
+    visit_counts: dict[Tuple[int, int], int] = {}
+    for tables in plan:
+        for t, ppl in enumerate(tables):
+            for i, a in enumerate(ppl):
+                if a not in leads:
+                    visit_counts[(a, t)] = visit_counts.get((a, t), 0) + 1
+                for b in ppl[i + 1:]:
+                    key = (a, b) if a < b else (b, a)
+                    pair_counts[key] = pair_counts.get(key, 0) + 1
+    repeated = sum(1 for c in pair_counts.values() if c > 1)
+    retable = sum(c - 1 for c in visit_counts.values() if c > 1)
+    never = n * (n - 1) // 2 - len(pair_counts)
+    return PlanScore(repeated_pairs=repeated, retable_visits=retable, never_met=never)
+
+
+class _PythonScoring:
+    """
+    État dense du glouton en Python pur (repli quand NumPy est absent).
+    Personnes indexées 0..n-1, chefs en tête (chef i -> table i).
+    """
+
+    def __init__(self, *, n: int, caps: List[int], lead_count: int,
+                 pair_penalty: int, seen_table_penalty: int, max_visits_per_table: int) -> None:
+        T = len(caps)
+        self.n, self.T, self.caps, self.lead_count = n, T, caps, lead_count
+        self.pair_penalty = pair_penalty
+        self.seen_table_penalty = seen_table_penalty
+        self.max_visits_per_table = max_visits_per_table
+        # met[i]: bitset (entier Python) des personnes déjà rencontrées par i
+        self.met: List[int] = [0] * n
+        # met_with[i]: mêmes personnes sous forme de liste, pour propager les conflits
+        self.met_with: List[List[int]] = [[] for _ in range(n)]
+        # visits[i * T + t]: nombre de passages de i à la table t
+        self.visits = array("H", bytes(2 * n * T))
+        self.conflicts = array("H")
+        self.sizes: List[int] = []
+        self.open_tables: List[int] = []
+
+    def start_session(self) -> None:
+        T = self.T
+        self.sizes = [1 if t < self.lead_count else 0 for t in range(T)]
+        # tables non pleines, dans l'ordre (départage à score égal inchangé)
+        self.open_tables = [t for t in range(T) if self.sizes[t] < self.caps[t]]
+        # conflicts[i * T + t]: nb de personnes déjà assises à t que i a déjà rencontrées.
+        # Tenu à jour à chaque placement, ce qui rend le choix de table O(T).
+        self.conflicts = conflicts = array("H", bytes(2 * self.n * T))
+        for t in range(self.lead_count):
+            for r in self.met_with[t]:
+                conflicts[r * T + t] += 1
+
+    def pick(self, p: int) -> int:
+        T = self.T
+        base = p * T
+        max_visits = self.max_visits_per_table
+        pair_penalty = self.pair_penalty
+        seen_table_penalty = self.seen_table_penalty
+        # meilleur candidat "primaire" (table pas encore visitée assez souvent)
+        # et meilleur candidat de repli; à score égal, la première table gagne
+        best_t, best_score = -1, 10**9
+        fb_t, fb_score = -1, 10**9
+        row_conflicts = self.conflicts[base:base + T]
+        row_visits = self.visits[base:base + T]
+        for t in self.open_tables:
+            # score: très forte pénalité si paire déjà vue (priorité exclusivité)
+            score = row_conflicts[t] * pair_penalty
+            visits_here = row_visits[t]
+            if visits_here < max_visits:
+                if visits_here:
+                    score += (visits_here + 1) * seen_table_penalty
+                if score < best_score:
+                    best_score, best_t = score, t
+            elif best_t < 0:
+                # pénalise re-table
+                score += (visits_here + 1) * seen_table_penalty
+                if score < fb_score:
+                    fb_score, fb_t = score, t
+        return best_t if best_t >= 0 else fb_t
+
+    def place(self, order: List[int], tables: List[List[int]],
+              cancel: CancellationToken | None) -> None:
+        """Place chacun, dans l'ordre, à la table de moindre score."""
+        for p in order:
+            if cancel is not None and cancel.cancelled:
+                raise PlanningCancelled()
+            t = self.pick(p)
+            if t < 0:
+                # toutes pleines -> devrait pas arriver car somme caps == N
+                continue
+            tables[t].append(p)
+            self.seat(p, t)
+
+    def seat(self, p: int, t: int) -> None:
+        T = self.T
+        self.sizes[t] += 1
+        if self.sizes[t] >= self.caps[t]:
+            self.open_tables.remove(t)
+        self.visits[p * T + t] += 1
+        conflicts = self.conflicts
+        for r in self.met_with[p]:
+            conflicts[r * T + t] += 1
+
+    def record_session(self, tables: List[List[int]]) -> None:
+        """Rejoue une session déjà tenue (historique) dans l'état."""
+        T = self.T
+        for t, ppl in enumerate(tables):
+            for p in ppl:
+                self.visits[p * T + t] += 1
+        self.end_session(tables)
+
+    def end_session(self, tables: List[List[int]]) -> None:
+        met, met_with = self.met, self.met_with
+        for ppl in tables:
+            for i in ppl:
+                met_i, with_i = met[i], met_with[i]
+                for j in ppl:
+                    if i != j and not met_i >> j & 1:
+                        met_i |= 1 << j
+                        with_i.append(j)
+                met[i] = met_i
+
+
+class _NumpyScoring:
+    """
+    Même glouton, vectorisé avec NumPy.
+      - met: matrice des rencontres n x n (uint8, 1 si déjà rencontrés)
+      - conflicts_t[t, i]: nombre de personnes déjà assises à t que i a rencontrées
+    Le score d'une personne pour toutes les tables est une colonne de conflicts_t
+    plus sa ligne de pénalité de re-table; les placements sont faits par lots
+    (voir place()) et donnent exactement le plan du moteur Python.
+    """
+
+    # décalages qui encodent les règles de candidature dans le score lui-même:
+    # une table déjà trop visitée ne sort que s'il n'y a aucune table "primaire",
+    # une table pleine jamais.
+    FALLBACK = 1 << 20
+    FULL = 1 << 28
+    # personnes placées par lot dans place(), et meilleures tables gardées par personne
+    BATCH = 64
+    CANDIDATES = 16
+
+    def __init__(self, *, n: int, caps: List[int], lead_count: int,
+                 pair_penalty: int, seen_table_penalty: int, max_visits_per_table: int) -> None:
+        T = len(caps)
+        self.n, self.T, self.lead_count = n, T, lead_count
+        self.caps = np.asarray(caps, dtype=np.int32)
+        self.pair_penalty = pair_penalty
+        self.seen_table_penalty = seen_table_penalty
+        self.max_visits_per_table = max_visits_per_table
+        self.met = np.zeros((n, n), dtype=np.uint8)
+        self.visits = np.zeros((n, T), dtype=np.int16)
+        # penalty[i, t]: pénalité de re-table (+ FALLBACK si i a épuisé ses visites de t)
+        self.penalty = np.zeros((n, T), dtype=np.int32)
+        # transposée (T x n) pour que la mise à jour d'une table soit contiguë
+        self.conflicts_t = np.zeros((T, n), dtype=np.int32)
+        self.sizes = np.zeros(T, dtype=np.int32)
+        self.full = np.zeros(T, dtype=np.int32)
+
+    def start_session(self) -> None:
+        self.conflicts_t.fill(0)
+        self.sizes.fill(0)
+        lc = self.lead_count
+        if lc:
+            self.sizes[:lc] = 1
+            self.conflicts_t[:lc] = self.met[:lc]
+        self.full = np.where(self.sizes >= self.caps, self.FULL, 0).astype(np.int32)
+
+    def place(self, order: List[int], tables: List[List[int]],
+              cancel: CancellationToken | None) -> None:
+        """
+        Même résultat que le placement un par un, mais NumPy ne travaille qu'une
+        fois par lot de BATCH personnes: scores du lot (BATCH x T) et, par personne,
+        ses CANDIDATES meilleures tables triées. Dans le lot, un placement ne peut
+        que faire monter des scores (table pleine, ou personne déjà rencontrée);
+        ces hausses sont suivies en Python et le choix de chacun est la première
+        candidate intacte, sauf si une candidate relevée fait encore mieux.
+        """
+        order_arr = np.asarray(order, dtype=np.intp)
+        FULL = self.FULL
+        sizes = self.sizes.tolist()
+        caps = self.caps.tolist()
+        T = self.T
+        width = min(T, self.CANDIDATES)
+        table_ids = np.arange(T, dtype=np.int64)
+        for pos in range(0, len(order_arr), self.BATCH):
+            if cancel is not None and cancel.cancelled:
+                raise PlanningCancelled()
+            ppl = order_arr[pos:pos + self.BATCH]
+            score = self.conflicts_t[:, ppl].T * self.pair_penalty
+            score += self.penalty[ppl]
+            score += self.full
+            # tri par (score, table) via une clé entière unique: score * T + table
+            keys = np.sort(score.astype(np.int64) * T + table_ids, axis=1)[:, :width].tolist()
+            # met_later[j]: rangs (dans le lot) des suivants de j qui l'ont déjà rencontré
+            met_later: List[List[int]] = [[] for _ in range(len(ppl))]
+            later, earlier = np.nonzero(self.met[ppl][:, ppl])
+            for r, j in zip(later.tolist(), earlier.tolist()):
+                if r > j:
+                    met_later[j].append(r)
+            raised: List[dict] = [{} for _ in range(len(ppl))]  # hausses de paires du lot
+            closed: set = set()  # tables remplies pendant le lot
+            seated, at = [], []
+            for j in range(len(ppl)):
+                bumps = raised[j]
+                best = None
+                for key in keys[j]:
+                    sc, t = divmod(key, T)
+                    if t in closed:
+                        continue
+                    if t in bumps:
+                        sc += bumps[t]
+                        if best is None or (sc, t) < best:
+                            best = (sc, t)
+                        continue
+                    if best is None or (sc, t) < best:
+                        best = (sc, t)
+                    break
+                else:
+                    # aucune candidate intacte: score complet de la ligne
+                    row = score[j].copy()
+                    for t, bump in bumps.items():
+                        row[t] += bump
+                    row[list(closed)] += FULL
+                    t = int(row.argmin())
+                    best = (int(row[t]), t)
+                if best[0] >= FULL:
+                    # toutes pleines -> devrait pas arriver car somme caps == N
+                    continue
+                t = best[1]
+                seated.append(j)
+                at.append(t)
+                for r in met_later[j]:
+                    raised[r][t] = raised[r].get(t, 0) + self.pair_penalty
+                sizes[t] += 1
+                if sizes[t] >= caps[t]:
+                    closed.add(t)
+            if not seated:
+                continue
+
+            people = ppl[seated].tolist()
+            conflicts_t, met = self.conflicts_t, self.met
+            for p, t in zip(people, at):
+                tables[t].append(p)
+                conflicts_t[t] += met[p]
+            idx = np.asarray(people, dtype=np.intp)
+            at_arr = np.asarray(at, dtype=np.intp)
+            v = self.visits[idx, at_arr] + 1
+            self.visits[idx, at_arr] = v
+            self.penalty[idx, at_arr] = (v + 1) * self.seen_table_penalty + np.where(
+                v >= self.max_visits_per_table, self.FALLBACK, 0
+            )
+            self.full = np.where(np.asarray(sizes) >= self.caps, FULL, 0).astype(np.int32)
+        self.sizes = np.asarray(sizes, dtype=np.int32)
+
+    def record_session(self, tables: List[List[int]]) -> None:
+        """Rejoue une session déjà tenue (historique) dans l'état."""
+        for t, ppl in enumerate(tables):
+            for p in ppl:
+                v = int(self.visits[p, t]) + 1
+                self.visits[p, t] = v
+                self.penalty[p, t] = (v + 1) * self.seen_table_penalty + (
+                    self.FALLBACK if v >= self.max_visits_per_table else 0
+                )
+        self.end_session(tables)
+
+    def end_session(self, tables: List[List[int]]) -> None:
+        # toutes les paires de toutes les tables en une affectation:
+        # tables complétées par -1 en une matrice T x k_max
+        width = max((len(ppl) for ppl in tables), default=0)
+        if width < 2:
+            return
+        seats = np.full((len(tables), width), -1, dtype=np.intp)
+        for t, ppl in enumerate(tables):
+            seats[t, :len(ppl)] = ppl
+        a = np.broadcast_to(seats[:, :, None], (len(tables), width, width))
+        b = np.broadcast_to(seats[:, None, :], (len(tables), width, width))
+        pairs = (a >= 0) & (b >= 0) & (a != b)
+        self.met[a[pairs], b[pairs]] = 1
+
 
 class Planner:
     """
@@ -19,6 +380,38 @@ class Planner:
     Sortie:
       plan[s][t] = [pids...] longueur == k_t (chef d'abord s'il y en a un)
     """
+
+    # pénalités du glouton
+    PAIR_PENALTY = 100
+    SEEN_TABLE_PENALTY = 50
+    MAX_VISITS_PER_TABLE = 1
+    # en mode "auto", NumPy n'est utilisé qu'à partir de cette taille: mesuré
+    # à égalité vers 100 personnes, 1,5x vers 200 (en dessous, le coût fixe des
+    # appels NumPy par lot dépasse le gain)
+    NUMPY_MIN_PEOPLE = 200
+
+    def __init__(self, backend: str = "auto") -> None:
+        """backend: "auto", "python" ou "numpy" (moteur de score du glouton)."""
+        if backend not in ("auto", "python", "numpy"):
+            raise ValueError(f"Moteur de planification inconnu: {backend}")
+        if backend == "numpy" and np is None:
+            raise RuntimeError("NumPy n'est pas installé")
+        self.backend = backend
+
+    def _make_scoring(self, n: int, caps: List[int], lead_count: int):
+        use_numpy = self.backend == "numpy" or (
+            self.backend == "auto" and np is not None and n >= self.NUMPY_MIN_PEOPLE
+        )
+        engine = _NumpyScoring if use_numpy else _PythonScoring
+        return engine(
+            n=n,
+            caps=caps,
+            lead_count=lead_count,
+            pair_penalty=self.PAIR_PENALTY,
+            seen_table_penalty=self.SEEN_TABLE_PENALTY,
+            max_visits_per_table=self.MAX_VISITS_PER_TABLE,
+        )
+
     def build_plan(
         self,
         *,
@@ -28,7 +421,44 @@ class Planner:
         fixed_leads: List[int],
         people: List[int],
         seed: int | None = None,
+        progress: ProgressCallback | None = None,
+        cancel: CancellationToken | None = None,
     ) -> List[List[List[int]]]:
+        return list(
+            self.build_plan_iter(
+                num_tables=num_tables,
+                sessions=sessions,
+                table_capacities=table_capacities,
+                fixed_leads=fixed_leads,
+                people=people,
+                seed=seed,
+                progress=progress,
+                cancel=cancel,
+            )
+        )
+
+    def build_plan_iter(
+        self,
+        *,
+        num_tables: int,
+        sessions: int,
+        table_capacities: List[int],
+        fixed_leads: List[int],
+        people: List[int],
+        seed: int | None = None,
+        history: Iterable[List[List[int]]] = (),
+        progress: ProgressCallback | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> Iterator[List[List[int]]]:
+        """
+        Variante en flux de build_plan: produit les tables de chaque session dès
+        qu'elle est définitive (plan[s] = [[pids...] par table]). Les entrées sont
+        validées immédiatement; le calcul d'une session n'a lieu qu'à sa demande.
+        history: sessions déjà tenues; elles initialisent les rencontres et visites
+        (les personnes absentes de people/fixed_leads y sont ignorées) sans être reproduites.
+        progress(sessions faites, S, None) est appelé après chaque session; cancel est
+        vérifié entre les sessions et entre les placements (PlanningCancelled).
+        """
         rng = random.Random(seed)
         T = num_tables
         S = sessions
@@ -44,7 +474,8 @@ class Planner:
         total_fixed = len(leads)
         if total_fixed > 0:
             # retire les chefs du pool s'ils y sont
-            people = [p for p in people if p not in set(leads)]
+            lead_set = set(leads)
+            people = [p for p in people if p not in lead_set]
 
         # capacité rotateurs par table = k_t - (1 si chef sinon 0)
         rot_need = [caps[t] - (1 if t < len(leads) else 0) for t in range(T)]
@@ -65,91 +496,605 @@ class Planner:
                 if sum(rot_need) != len(people):
                     raise ValueError("Incohérence capacités vs personnes.")
 
-        # états pour éviter les répétitions
-        met_pairs: Dict[Tuple[int, int], int] = defaultdict(int)
-        seen_with_lead: Dict[int, Set[int]] = defaultdict(set)  # personne -> set(index table) si chef fixe
-        seen_table: Dict[int, Set[int]] = defaultdict(set)      # personne -> set(index table), pour limiter re-table
-        visit_count: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
-
-        # max_visits_per_table: nombre de fois qu'une personne peut revenir sur la même table
-        # avant d'être reléguée en fallback (rotation forcée par défaut)
-        max_visits_per_table = 1
-        seen_table_penalty = 50
-
-        plan: List[List[List[int]]] = []
+        # indexation dense: chefs 0..L-1 (chef i -> table i), puis rotatifs L..n-1.
+        # Tout l'état interne est indexé ainsi; on ne revient aux vrais IDs qu'en sortie.
+        ids: List[int] = leads + people
+        n = len(ids)
+        lead_count = len(leads)
+        scoring = self._make_scoring(n, caps, lead_count)
+        index = {pid: i for i, pid in enumerate(ids)}
+        for past in history:
+            scoring.record_session(
+                [[index[pid] for pid in ppl if pid in index] for ppl in past[:T]]
+            )
+        return self._iter_sessions(scoring, rng, ids, lead_count, T, S, progress, cancel)
 
-        # shuffle initial global
-        pool = people[:]
+    def _iter_sessions(self, scoring, rng: random.Random, ids: List[int], lead_count: int,
+                       T: int, S: int, progress: ProgressCallback | None,
+                       cancel: CancellationToken | None) -> Iterator[List[List[int]]]:
+        n = len(ids)
+        # shuffle initial global (même permutation que sur les IDs bruts)
+        pool = list(range(lead_count, n))
         rng.shuffle(pool)
 
-        # pré-calcul: tables indexées 0..T-1 ; leads[t] si t < len(leads)
         for s in range(S):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
             # on prépare les tables de la session avec chef en tête si présent
-            tables: List[List[int]] = []
-            for t in range(T):
-                row = []
-                if t < len(leads):
-                    row.append(leads[t])
-                tables.append(row)
-
-            # tailles cibles rotatifs pour cette session
-            need = rot_need[:]  # constants
+            tables: List[List[int]] = [[t] if t < lead_count else [] for t in range(T)]
+            scoring.start_session()
 
             # ordre d'assignation
             order = pool[:]
             rng.shuffle(order)
 
             # glouton: placer chacun en minimisant les répétitions (priorité exclusivité)
-            for p in order:
-                # build candidates: tables non pleines et (optionnel) non revisitées trop souvent
-                primary_candidates = []
-                fallback_candidates = []
+            scoring.place(order, tables, cancel)
+
+            # une fois remplie, on met à jour les paires rencontrées
+            scoring.end_session(tables)
+
+            if progress is not None:
+                progress(s + 1, S, None)
+            yield [[ids[i] for i in ppl] for ppl in tables]
+
+    def replan_remaining(
+        self,
+        past_sessions: List[List[List[int]]],
+        *,
+        num_tables: int,
+        sessions: int,
+        table_capacities: List[int],
+        fixed_leads: List[int],
+        people: List[int],
+        seed: int | None = None,
+        time_budget: float = 0.5,
+        progress: ProgressCallback | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> List[List[List[int]]]:
+        """
+        Re-planifie après arrivées tardives / départs: les sessions déjà tenues
+        (past_sessions) sont conservées telles quelles et servent d'historique;
+        seules les sessions restantes (jusqu'à `sessions` au total) sont recalculées
+        avec la liste de participants à jour, puis améliorées par recherche locale
+        pendant au plus time_budget secondes.
+        Les chefs toujours présents gardent la table qu'ils occupent déjà; un nouveau
+        chef ne prend que la table d'un chef parti (fixed_leads sert seulement à
+        savoir qui est chef, pas à ordonner les tables).
+        progress(sessions recalculées, sessions à recalculer, None) est appelé après
+        chaque session; cancel est vérifié pendant le glouton et la recherche locale.
+        Renvoie le plan complet (sessions passées + nouvelles).
+        """
+        held = [[list(ppl) for ppl in tables] for tables in past_sessions[:sessions]]
+        if any(len(tables) != num_tables for tables in held):
+            raise ValueError("Le nombre de tables diffère de celui des sessions déjà tenues.")
+        fixed_leads = self._leads_by_held_table(held, fixed_leads, num_tables)
+        remaining = list(
+            self.build_plan_iter(
+                num_tables=num_tables,
+                sessions=sessions - len(held),
+                table_capacities=table_capacities,
+                fixed_leads=fixed_leads,
+                people=people,
+                seed=seed,
+                history=held,
+                progress=progress,
+                cancel=cancel,
+            )
+        )
+        if not remaining:
+            return held
+        plan, _ = self.improve_plan(
+            held + remaining,
+            fixed_leads=list(fixed_leads)[:num_tables],
+            time_budget=time_budget,
+            seed=seed,
+            frozen_sessions=len(held),
+            cancel=cancel,
+        )
+        return plan
+
+    @staticmethod
+    def _leads_by_held_table(
+        held: List[List[List[int]]], fixed_leads: List[int], num_tables: int
+    ) -> List[int]:
+        """
+        Réordonne fixed_leads selon les tables déjà tenues: chaque chef encore chef
+        reste à sa table (tête de table de la dernière session tenue), les nouveaux
+        chefs comblent, dans l'ordre, les tables dont le chef est parti.
+        """
+        leads = list(fixed_leads)[:num_tables]
+        if not held or len(leads) < num_tables:
+            return list(fixed_leads)
+        lead_set = set(leads)
+        by_table: List[int | None] = [None] * num_tables
+        placed = set()
+        for t, ppl in enumerate(held[-1]):
+            head = ppl[0] if ppl else None
+            if head in lead_set and head not in placed:
+                by_table[t] = head
+                placed.add(head)
+        newcomers = iter(p for p in leads if p not in placed)
+        return [head if head is not None else next(newcomers) for head in by_table]
+
+    def improve_plan(
+        self,
+        plan: List[List[List[int]]],
+        *,
+        fixed_leads: List[int],
+        time_budget: float = 2.0,
+        max_iterations: int | None = None,
+        seed: int | None = None,
+        frozen_sessions: int = 0,
+        cancel: CancellationToken | None = None,
+    ) -> Tuple[List[List[List[int]]], ImprovementStats]:
+        """
+        Recherche locale (recuit simulé) après le glouton: échange deux rotatifs
+        de tables différentes dans une même session. Les chefs fixes ne bougent jamais.
+        Coût = PAIR_PENALTY par rencontre en trop + SEEN_TABLE_PENALTY par re-table;
+        chaque échange est évalué en O(k) sur les deux tables concernées.
+        Les frozen_sessions premières sessions (déjà tenues) comptent dans le coût
+        mais ne sont jamais modifiées.
+        S'arrête après time_budget secondes (ou max_iterations) et renvoie
+        le meilleur plan rencontré avec les statistiques avant/après.
+        cancel est vérifié régulièrement (PlanningCancelled).
+        """
+        started = time.perf_counter()
+        initial = score_plan(plan, fixed_leads)
+        if not plan or not plan[0] or len(plan[0]) < 2 or frozen_sessions >= len(plan):
+            stats = ImprovementStats(initial, initial, 0, 0, time.perf_counter() - started)
+            return [[list(ppl) for ppl in tables] for tables in plan], stats
+
+        rng = random.Random(seed)
+        S, T = len(plan), len(plan[0])
+        lead_set = set(fixed_leads)
+
+        # indexation dense, comme pour build_plan
+        ids = sorted({pid for tables in plan for ppl in tables for pid in ppl})
+        index = {pid: i for i, pid in enumerate(ids)}
+        n = len(ids)
+        current = [[[index[pid] for pid in ppl] for ppl in tables] for tables in plan]
+        is_lead = bytearray(n)
+        for pid in lead_set:
+            if pid in index:
+                is_lead[index[pid]] = 1
+
+        # counts[a * n + b]: rencontres de a et b (symétrique); visits[i * T + t]
+        counts = array("H", bytes(2 * n * n))
+        visits = array("H", bytes(2 * n * T))
+        for tables in current:
+            for t, ppl in enumerate(tables):
+                for a in ppl:
+                    visits[a * T + t] += 1
+                    for b in ppl:
+                        if a != b:
+                            counts[a * n + b] += 1
+
+        w_pair, w_table = self.PAIR_PENALTY, self.SEEN_TABLE_PENALTY
+        cost = 0
+        for a in range(n):
+            row = a * n
+            for b in range(a + 1, n):
+                c = counts[row + b]
+                if c > 1:
+                    cost += (c - 1) * w_pair
+            if not is_lead[a]:
                 for t in range(T):
-                    # place dispo ?
-                    cap = caps[t]
-                    if len(tables[t]) >= cap:  # pleine
-                        continue
-                    visits_here = visit_count[p][t]
-                    if visits_here < max_visits_per_table:
-                        primary_candidates.append(t)
-                    else:
-                        fallback_candidates.append(t)
+                    v = visits[a * T + t]
+                    if v > 1:
+                        cost += (v - 1) * w_table
 
-                candidates = primary_candidates if primary_candidates else fallback_candidates
+        # positions échangeables (rotatifs) par session et table
+        movable = [
+            [[i for i, pid in enumerate(ppl) if not is_lead[pid]] for ppl in tables]
+            for tables in current
+        ]
 
-                if not candidates:
-                    # toutes pleines -> devrait pas arriver car somme caps == N
+        best_cost = cost
+        best = None  # copie du meilleur plan, prise seulement quand on s'en éloigne
+        temperature0 = w_pair / 2
+        iterations = accepted = 0
+        deadline = started + max(0.0, time_budget)
+        frac = 0.0  # avancement 0..1, pilote la température
+
+        while best_cost > 0:
+            if max_iterations is not None:
+                if iterations >= max_iterations:
+                    break
+                frac = iterations / max_iterations
+            if iterations & 127 == 0:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if max_iterations is None:
+                    frac = (now - started) / max(time_budget, 1e-9)
+            iterations += 1
+
+            s = rng.randrange(frozen_sessions, S)
+            t1 = rng.randrange(T)
+            t2 = rng.randrange(T - 1)
+            if t2 >= t1:
+                t2 += 1
+            pos1, pos2 = movable[s][t1], movable[s][t2]
+            if not pos1 or not pos2:
+                continue
+            table1, table2 = current[s][t1], current[s][t2]
+            i = pos1[rng.randrange(len(pos1))]
+            j = pos2[rng.randrange(len(pos2))]
+            a, b = table1[i], table2[j]
+
+            # delta: a et b quittent leur table et rejoignent l'autre
+            ra, rb = a * n, b * n
+            delta = 0
+            for m in table1:
+                if m != a:
+                    if counts[rb + m] >= 1:
+                        delta += w_pair
+                    if counts[ra + m] >= 2:
+                        delta -= w_pair
+            for m in table2:
+                if m != b:
+                    if counts[ra + m] >= 1:
+                        delta += w_pair
+                    if counts[rb + m] >= 2:
+                        delta -= w_pair
+            va, vb = a * T, b * T
+            if visits[va + t2] >= 1:
+                delta += w_table
+            if visits[va + t1] >= 2:
+                delta -= w_table
+            if visits[vb + t1] >= 1:
+                delta += w_table
+            if visits[vb + t2] >= 2:
+                delta -= w_table
+
+            if delta > 0:
+                temperature = temperature0 * (1.0 - frac)
+                if temperature <= 0 or rng.random() >= math.exp(-delta / temperature):
                     continue
+                if cost == best_cost and best is None:
+                    best = [[list(ppl) for ppl in tables] for tables in current]
 
-                # score: très forte pénalité si paire déjà vue (priorité exclusivité)
-                best_t, best_score = None, 10**9
-                for t in candidates:
-                    score = 0
-                    # pénalise re-table
-                    if t in seen_table[p]:
-                        score += (visit_count[p][t] + 1) * seen_table_penalty
-                    # pénalise pairs déjà rencontrées
-                    for other in tables[t]:
-                        a, b = sorted((p, other))
-                        if met_pairs[(a, b)] > 0:
-                            score += 100
-                    if score < best_score:
-                        best_score, best_t = score, t
-
-                tables[best_t].append(p)
-                seen_table[p].add(best_t)
-                visit_count[p][best_t] += 1
-                if best_t < len(leads):
-                    seen_with_lead[p].add(best_t)
+            # applique l'échange
+            for m in table1:
+                if m != a:
+                    counts[ra + m] -= 1; counts[m * n + a] -= 1
+                    counts[rb + m] += 1; counts[m * n + b] += 1
+            for m in table2:
+                if m != b:
+                    counts[rb + m] -= 1; counts[m * n + b] -= 1
+                    counts[ra + m] += 1; counts[m * n + a] += 1
+            visits[va + t1] -= 1; visits[va + t2] += 1
+            visits[vb + t2] -= 1; visits[vb + t1] += 1
+            table1[i], table2[j] = b, a
+            cost += delta
+            accepted += 1
+            if cost < best_cost:
+                best_cost = cost
+                best = None  # le plan courant est le meilleur
 
-            # une fois remplie, on met à jour les paires rencontrées
-            for t in range(T):
-                ppl = tables[t]
-                for i in range(len(ppl)):
-                    for j in range(i + 1, len(ppl)):
-                        a, b = sorted((ppl[i], ppl[j]))
-                        met_pairs[(a, b)] += 1
+        result = current if best is None else best
+        improved = [[[ids[i] for i in ppl] for ppl in tables] for tables in result]
+        stats = ImprovementStats(
+            initial=initial,
+            final=score_plan(improved, fixed_leads),
+            iterations=iterations,
+            accepted_swaps=accepted,
+            elapsed=time.perf_counter() - started,
+        )
+        return improved, stats
 
-            plan.append(tables)
+    # nombre d'itérations de recherche locale par départ du multi-départ:
+    # fixe (et non en temps) pour que seed + itérations reproduisent exactement le plan
+    MULTISTART_IMPROVE_ITERATIONS = 50_000
+
+    def build_improved_plan(
+        self,
+        *,
+        num_tables: int,
+        sessions: int,
+        table_capacities: List[int],
+        fixed_leads: List[int],
+        people: List[int],
+        seed: int,
+        improve_iterations: int = MULTISTART_IMPROVE_ITERATIONS,
+        cancel: CancellationToken | None = None,
+    ) -> Tuple[List[List[List[int]]], PlanScore]:
+        """Glouton + recherche locale déterministes pour une graine donnée."""
+        plan = self.build_plan(
+            num_tables=num_tables,
+            sessions=sessions,
+            table_capacities=table_capacities,
+            fixed_leads=fixed_leads,
+            people=people,
+            seed=seed,
+            cancel=cancel,
+        )
+        plan, stats = self.improve_plan(
+            plan,
+            fixed_leads=list(fixed_leads)[:num_tables],
+            time_budget=math.inf,
+            max_iterations=improve_iterations,
+            seed=seed,
+            cancel=cancel,
+        )
+        return plan, stats.final
+
+    def build_plan_multistart(
+        self,
+        *,
+        num_tables: int,
+        sessions: int,
+        table_capacities: List[int],
+        fixed_leads: List[int],
+        people: List[int],
+        starts: int | None = None,
+        time_budget: float = 2.0,
+        max_workers: int | None = None,
+        seed: int | None = None,
+        improve_iterations: int = MULTISTART_IMPROVE_ITERATIONS,
+        progress: ProgressCallback | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> MultiStartResult:
+        """
+        Enchaîne des départs (une graine chacun) sur un pool de processus et garde
+        le meilleur selon PlanScore.key(): doublons, puis re-tables, puis paires
+        jamais rencontrées. Chaque départ fait improve_iterations itérations (graine +
+        itérations reproduisent le plan); de nouvelles graines sont soumises tant que
+        le budget n'est pas écoulé, au plus `starts` si fourni (None: sans limite, sauf
+        budget infini où l'on fait un départ par cœur).
+        À l'échéance (on attend toutefois le premier résultat) ou à l'annulation, les
+        processus encore occupés sont arrêtés.
+        progress(départs terminés, starts ou 0 si non borné, meilleur score) est appelé
+        à chaque départ terminé; cancel est surveillé pendant l'attente (PlanningCancelled).
+        """
+        cpus = os.cpu_count() or 1
+        if starts is None and math.isinf(time_budget):
+            starts = cpus
+        workers = max(1, min(starts or cpus, max_workers or cpus))
+        rng = random.Random(seed)
+        params = dict(
+            num_tables=num_tables,
+            sessions=sessions,
+            table_capacities=list(table_capacities),
+            fixed_leads=list(fixed_leads),
+            people=list(people),
+        )
+
+        results = []
+        submitted = 0
+
+        def best_key(result) -> Tuple[Tuple[int, int, int], int]:
+            return result[2].key(), result[0]
 
+        def collect(result) -> None:
+            results.append(result)
+            if progress is not None:
+                progress(len(results), starts or 0, min(results, key=best_key)[2])
+
+        def next_seed() -> int | None:
+            # graines tirées dans le même ordre quel que soit le nombre de workers
+            nonlocal submitted
+            if starts is not None and submitted >= starts:
+                return None
+            if results and time.perf_counter() >= deadline:
+                return None
+            submitted += 1
+            return rng.randrange(2**31)
+
+        deadline = time.perf_counter() + time_budget
+        if workers == 1:
+            # pas de processus pour un seul worker; le budget est vérifié entre départs
+            while (sd := next_seed()) is not None:
+                plan, score = self.build_improved_plan(
+                    **params, seed=sd, improve_iterations=improve_iterations, cancel=cancel
+                )
+                collect((sd, plan, score))
+        else:
+            # "spawn": appelé depuis un thread d'une appli Qt, un fork hériterait de verrous tenus
+            finished: queue.Queue = queue.Queue()
+            pool = multiprocessing.get_context("spawn").Pool(workers)
+            try:
+                def submit() -> bool:
+                    sd = next_seed()
+                    if sd is None:
+                        return False
+                    pool.apply_async(
+                        _run_start,
+                        (self, params, sd, improve_iterations),
+                        callback=finished.put,
+                        error_callback=finished.put,
+                    )
+                    return True
+
+                running = sum(submit() for _ in range(workers))
+                # attente par tranches courtes pour réagir vite à une annulation
+                while running and (not results or time.perf_counter() < deadline):
+                    if cancel is not None:
+                        cancel.raise_if_cancelled()
+                    try:
+                        outcome = finished.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    running -= 1
+                    if isinstance(outcome, BaseException):
+                        raise outcome
+                    collect(outcome)
+                    running += submit()
+            finally:
+                # arrête aussi les départs en cours (budget écoulé ou annulation)
+                pool.terminate()
+                pool.join()
+
+        best_seed, best_plan, best_score = min(results, key=best_key)
+        return MultiStartResult(
+            plan=best_plan,
+            seed=best_seed,
+            score=best_score,
+            improve_iterations=improve_iterations,
+            runs=len(results),
+        )
+
+
+def _prime_power(q: int) -> Tuple[int, int] | None:
+    """(p, m) si q = p**m avec p premier, sinon None."""
+    if q < 2:
+        return None
+    p = next(d for d in range(2, q + 1) if q % d == 0)  # plus petit facteur: premier
+    m = 0
+    while q % p == 0:
+        q //= p
+        m += 1
+    return (p, m) if q == 1 else None
+
+
+@lru_cache(maxsize=None)
+def _galois_field(q: int) -> Tuple[List[List[int]], List[List[int]]] | None:
+    """
+    Tables d'addition et de multiplication de GF(q), q premier ou puissance de premier.
+    Un élément est un entier dont les chiffres en base p sont les coefficients d'un
+    polynôme sur GF(p); la multiplication se fait modulo un polynôme irréductible de
+    degré m, cherché par force brute (q reste petit ici).
+    """
+    pm = _prime_power(q)
+    if pm is None:
+        return None
+    p, m = pm
+
+    def digits(x: int) -> List[int]:
+        return [(x // p**i) % p for i in range(m)]
+
+    def number(ds: List[int]) -> int:
+        return sum(d * p**i for i, d in enumerate(ds))
+
+    add = [[number([(a + b) % p for a, b in zip(digits(x), digits(y))]) for y in range(q)] for x in range(q)]
+
+    def mul_mod(x: int, y: int, modulus: List[int]) -> int:
+        prod = [0] * (2 * m - 1)
+        for i, a in enumerate(digits(x)):
+            for j, b in enumerate(digits(y)):
+                prod[i + j] = (prod[i + j] + a * b) % p
+        # réduction par le polynôme unitaire x^m + modulus[m-1] x^(m-1) + ... + modulus[0]
+        for deg in range(2 * m - 2, m - 1, -1):
+            c = prod[deg]
+            if c:
+                prod[deg] = 0
+                for i in range(m):
+                    prod[deg - m + i] = (prod[deg - m + i] - c * modulus[i]) % p
+        return number(prod[:m])
+
+    for candidate in range(q):
+        modulus = digits(candidate)
+        mul = [[mul_mod(x, y, modulus) for y in range(q)] for x in range(q)]
+        # corps <=> chaque élément non nul a un inverse
+        if all(1 in mul[x][1:] for x in range(1, q)):
+            return add, mul
+    return None  # pragma: no cover - il existe toujours un polynôme irréductible
+
+
+class ConstructivePlanner(Planner):
+    """
+    Planner qui écrit directement un plan optimal (zéro doublon) quand les paramètres
+    correspondent au plan affine AG(2, q), q premier ou puissance de premier:
+      - N = q² personnes, T = q tables de q places,
+      - sans chef: jusqu'à q + 1 sessions (chaque paire se rencontre exactement une fois
+        après q + 1 sessions),
+      - avec q chefs fixes (un par table): jusqu'à q sessions, aucun rotatif ne revient
+        à une table.
+    Ex.: 49 personnes en 7 tables, 64 en 8 tables. Sinon, repli sur l'heuristique.
+
+    Personnes = points (x, y) de GF(q)²; une session = une direction de droites,
+    une table = une droite. Chef b = point (0, b), toujours sur la droite y = m·x + b,
+    donc à la table b quelle que soit la pente m.
+    """
+
+    def construct(
+        self,
+        *,
+        num_tables: int,
+        sessions: int,
+        table_capacities: List[int],
+        fixed_leads: List[int],
+        people: List[int],
+        seed: int | None = None,
+    ) -> List[List[List[int]]] | None:
+        """Plan construit en O(N·S), ou None si les paramètres ne s'y prêtent pas."""
+        q = num_tables
+        leads = list(fixed_leads)[:q]
+        lead_set = set(leads)
+        rotators = [p for p in people if p not in lead_set]
+        if len(leads) not in (0, q) or len(table_capacities) != q:
+            return None
+        if any(cap != q for cap in table_capacities) or len(rotators) + len(leads) != q * q:
+            return None
+        max_sessions = q if leads else q + 1
+        if sessions > max_sessions:
+            return None
+        field = _galois_field(q)
+        if field is None:
+            return None
+        add, mul = field
+        neg = [next(y for y in range(q) if add[x][y] == 0) for x in range(q)]
+
+        # affectation personnes -> points; les chefs occupent (0, b)
+        rng = random.Random(seed)
+        order = rotators[:]
+        rng.shuffle(order)
+        points: List[Tuple[int, int, int]] = []  # (x, y, pid)
+        if leads:
+            points.extend((0, b, pid) for b, pid in enumerate(leads))
+            coords = [(x, y) for x in range(1, q) for y in range(q)]
+        else:
+            coords = [(x, y) for x in range(q) for y in range(q)]
+        points.extend((x, y, pid) for (x, y), pid in zip(coords, order))
+
+        # une direction par session: pentes m = 0..q-1, puis (sans chef) les verticales
+        plan: List[List[List[int]]] = []
+        for m in range(min(sessions, q)):
+            tables: List[List[int]] = [[] for _ in range(q)]
+            for x, y, pid in points:
+                # droite y = m·x + b  =>  b = y - m·x ; table b (celle du chef b)
+                tables[add[y][neg[mul[m][x]]]].append(pid)
+            plan.append(tables)
+        if sessions > q:
+            tables = [[] for _ in range(q)]
+            for x, y, pid in points:
+                tables[x].append(pid)
+            plan.append(tables)
         return plan
+
+    _CONSTRUCT_PARAMS = ("num_tables", "sessions", "table_capacities", "fixed_leads", "people")
+
+    def build_plan_iter(self, **params) -> Iterator[List[List[int]]]:
+        if params.get("history"):
+            # la construction part d'un plan vierge: avec un historique, heuristique
+            return super().build_plan_iter(**params)
+        plan = self.construct(
+            **{key: params[key] for key in self._CONSTRUCT_PARAMS}, seed=params.get("seed")
+        )
+        if plan is None:
+            return super().build_plan_iter(**params)
+        if params.get("progress") is not None:
+            params["progress"](len(plan), len(plan), None)
+        return iter(plan)
+
+    def build_plan_multistart(self, **params) -> MultiStartResult:
+        construct_params = {key: params[key] for key in self._CONSTRUCT_PARAMS}
+        seed = params.get("seed")
+        if seed is None:
+            seed = random.randrange(2**31)
+        plan = self.construct(**construct_params, seed=seed)
+        if plan is None:
+            return super().build_plan_multistart(**params)
+        score = score_plan(plan, construct_params["fixed_leads"][: params["num_tables"]])
+        if params.get("progress") is not None:
+            params["progress"](1, 1, score)
+        return MultiStartResult(
+            plan=plan,
+            seed=seed,
+            score=score,
+            improve_iterations=0,
+            runs=1,
+        )
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QHBoxLayout,
+    QLabel,
+    QListWidget,
+    QListWidgetItem,
+    QPushButton,
+    QVBoxLayout,
+)
+
+
+class EventListDialog(QDialog):
+    """Choix d'une réunion parmi celles du fichier ouvert (liste paginée)."""
+
+    PAGE_SIZE = 50
+
+    def __init__(self, persistence, parent=None):
+        super().__init__(parent)
+        self.p = persistence
+        self.offset = 0
+        self.total = self.p.count_events()
+        self.setWindowTitle("Changer de réunion")
+        self.resize(480, 520)
+
+        layout = QVBoxLayout(self)
+        self.list = QListWidget(self)
+        self.list.itemDoubleClicked.connect(lambda _item: self.accept())
+        layout.addWidget(self.list)
+
+        nav = QHBoxLayout()
+        self.btn_prev = QPushButton("◀ Plus récentes", self)
+        self.btn_next = QPushButton("Plus anciennes ▶", self)
+        self.lbl_page = QLabel(self)
+        self.btn_prev.clicked.connect(lambda: self._load(self.offset - self.PAGE_SIZE))
+        self.btn_next.clicked.connect(lambda: self._load(self.offset + self.PAGE_SIZE))
+        nav.addWidget(self.btn_prev)
+        nav.addStretch(1)
+        nav.addWidget(self.lbl_page)
+        nav.addStretch(1)
+        nav.addWidget(self.btn_next)
+        layout.addLayout(nav)
+
+        btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+        self._load(0)
+
+    def _load(self, offset: int):
+        self.offset = max(0, offset)
+        self.list.clear()
+        for evt in self.p.list_events(offset=self.offset, limit=self.PAGE_SIZE):
+            label = f"{evt['date_start']:%d/%m/%Y %H:%M} — {evt['name']}"
+            item = QListWidgetItem(label, self.list)
+            item.setData(Qt.UserRole, evt["id"])
+            if evt["id"] == self.p.event_id:
+                self.list.setCurrentItem(item)
+        last = min(self.total, self.offset + self.PAGE_SIZE)
+        self.lbl_page.setText(f"{self.offset + 1 if self.total else 0}–{last} sur {self.total}")
+        self.btn_prev.setEnabled(self.offset > 0)
+        self.btn_next.setEnabled(last < self.total)
+
+    def selected_event_id(self) -> int | None:
+        item = self.list.currentItem()
+        return item.data(Qt.UserRole) if item else None
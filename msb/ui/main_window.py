@@ -20,6 +20,7 @@ from msb.services.export_service import ExportService
 from msb.services.persistence import Persistence
 from msb.ui.dialogs.new_event_dialog import NewEventDialog
 from msb.ui.dialogs.bulk_add_dialog import BulkAddDialog
+from msb.ui.dialogs.event_list_dialog import EventListDialog
 from msb.ui.pages.participants_page import ParticipantsPage
 from msb.ui.pages.settings_page import SettingsPage
 from msb.ui.pages.plan_page import PlanPage
@@ -59,11 +60,12 @@ class MainWindow(QMainWindow):
 
         self.page_participants = ParticipantsPage(self.persistence, on_ratio_changed=self._update_lead_ratio)
         self.page_settings = SettingsPage(self.persistence, on_changed=self._on_params_changed)
-        self.page_plan = PlanPage(self.persistence)
+        self.page_plan = PlanPage(self.persistence, before_read=self._flush_settings)
 
         self.tabs.addTab(self.page_participants, "Participants")
         self.tabs.addTab(self.page_settings, "Settings")
         self.tabs.addTab(self.page_plan, "Plan de table")
+        self.tabs.currentChanged.connect(lambda _index: self._flush_settings())
 
         # StatusBar
         self.status = QStatusBar(self)
@@ -77,14 +79,22 @@ class MainWindow(QMainWindow):
         self._create_actions()
         self._create_menus()
 
+    def closeEvent(self, event):
+        self._flush_settings()
+        super().closeEvent(event)
+
     # --- Actions/menus
     def _create_actions(self) -> None:
         self.act_new = QAction("Nouvelle réunion…", self); self.act_new.setShortcut(QKeySequence.New)
         self.act_open = QAction("Ouvrir…", self); self.act_open.setShortcut(QKeySequence.Open)
         self.act_close = QAction("Fermer la réunion", self)
+        self.act_switch = QAction("Changer de réunion…", self)
+        self.act_clone = QAction("Dupliquer la réunion (participants)…", self)
         self.act_quit = QAction("Quitter", self); self.act_quit.setShortcut(QKeySequence.Quit)
 
         self.act_import_excel = QAction("Importer depuis Excel…", self)
+        self.act_import_csv = QAction("Importer depuis CSV…", self)
+        self.act_sync_excel = QAction("Synchroniser depuis Excel…", self)
         self.act_import_ui = QAction("Ajouter en masse (UI)…", self)
         self.act_export_excel = QAction("Exporter plan (Excel)…", self)
         self.act_export_template = QAction("Exporter exemple d'import (Excel)…", self)
@@ -93,9 +103,13 @@ class MainWindow(QMainWindow):
         self.act_new.triggered.connect(self.on_new_event)
         self.act_open.triggered.connect(self.on_open_event)
         self.act_close.triggered.connect(self.on_close_event)
+        self.act_switch.triggered.connect(self.on_switch_event)
+        self.act_clone.triggered.connect(self.on_clone_event)
         self.act_quit.triggered.connect(self.close)
 
         self.act_import_excel.triggered.connect(self.on_import_excel)
+        self.act_import_csv.triggered.connect(self.on_import_csv)
+        self.act_sync_excel.triggered.connect(self.on_sync_excel)
         self.act_import_ui.triggered.connect(self.on_import_ui)
         self.act_export_excel.triggered.connect(self.on_export_excel)
         self.act_export_template.triggered.connect(self.on_export_template)
@@ -108,10 +122,15 @@ class MainWindow(QMainWindow):
         m_file.addAction(self.act_open)
         m_file.addAction(self.act_close)
         m_file.addSeparator()
+        m_file.addAction(self.act_switch)
+        m_file.addAction(self.act_clone)
+        m_file.addSeparator()
         m_file.addAction(self.act_quit)
 
         m_import = bar.addMenu("&Importer")
         m_import.addAction(self.act_import_excel)
+        m_import.addAction(self.act_import_csv)
+        m_import.addAction(self.act_sync_excel)
         m_import.addAction(self.act_import_ui)
 
         m_export = bar.addMenu("&Exporter")
@@ -133,7 +152,99 @@ class MainWindow(QMainWindow):
 
         self.page_participants.reload()
         self._update_lead_ratio()
-        QMessageBox.information(self, "Import terminé", f"{added} participant(s) importé(s).")
+        QMessageBox.information(self, "Import terminé", self._import_summary(f"{added} participant(s) importé(s)."))
+
+    def on_import_csv(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importer depuis CSV", "", "CSV (*.csv *.tsv *.txt)")
+        if not path:
+            return
+        try:
+            added = self.import_service.import_from_csv(path)
+        except Exception as exc:
+            log.exception("Import CSV échoué")
+            QMessageBox.critical(self, "Erreur d'import", str(exc))
+            return
+
+        self.page_participants.reload()
+        self._update_lead_ratio()
+        QMessageBox.information(self, "Import terminé", self._import_summary(f"{added} participant(s) importé(s)."))
+
+    def on_sync_excel(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Synchroniser depuis Excel", "", "Excel (*.xlsx)")
+        if not path:
+            return
+        try:
+            # aperçu du diff (rien n'est écrit) pour demander confirmation en connaissance de cause
+            preview = self.import_service.sync_from_excel(path, remove_missing=True, dry_run=True)
+        except Exception as exc:
+            log.exception("Synchronisation Excel échouée")
+            QMessageBox.critical(self, "Erreur d'import", str(exc))
+            return
+        counts = (
+            f"{preview.added} à ajouter, {preview.updated} à mettre à jour, "
+            f"{preview.unchanged} inchangé(s), {preview.removed} absent(s) du fichier."
+        )
+        if preview.removed and not (preview.updated or preview.unchanged):
+            # aucune personne connue dans le fichier : on ne propose pas de tout supprimer
+            answer = QMessageBox.question(
+                self,
+                "Synchroniser les participants",
+                f"{counts}\n\n"
+                "Aucun participant du fichier n'est déjà inscrit : personne ne sera supprimé.\n"
+                "Ajouter seulement les nouveaux participants ?",
+                QMessageBox.Ok | QMessageBox.Cancel,
+                QMessageBox.Cancel,
+            )
+        elif preview.removed:
+            answer = QMessageBox.question(
+                self,
+                "Synchroniser les participants",
+                f"{counts}\n\n"
+                f"Supprimer aussi les {preview.removed} participant(s) absent(s) du fichier ?\n"
+                "(leurs places sont retirées du plan, le reste du plan est conservé)",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+                QMessageBox.No,
+            )
+        else:
+            answer = QMessageBox.question(
+                self,
+                "Synchroniser les participants",
+                f"{counts}\n\nAppliquer la synchronisation ?",
+                QMessageBox.Ok | QMessageBox.Cancel,
+                QMessageBox.Ok,
+            )
+        if answer == QMessageBox.Cancel:
+            return
+        try:
+            report = self.import_service.sync_from_excel(path, remove_missing=answer == QMessageBox.Yes)
+        except Exception as exc:
+            log.exception("Synchronisation Excel échouée")
+            QMessageBox.critical(self, "Erreur d'import", str(exc))
+            return
+
+        self.page_participants.reload()
+        self.page_plan.load_existing_plan()
+        self._update_lead_ratio()
+        lines = [
+            f"{report.added} ajouté(s), {report.updated} mis à jour, "
+            f"{report.removed} supprimé(s), {report.unchanged} inchangé(s)."
+        ]
+        if report.skipped:
+            lines.append(f"{len(report.skipped)} ligne(s) en double ignorée(s).")
+        QMessageBox.information(self, "Synchronisation terminée", "\n".join(lines))
+
+    def _import_summary(self, text: str) -> str:
+        # ajoute au message les lignes ignorées (doublons) du dernier import
+        skipped = getattr(self.import_service, "last_report", None)
+        skipped = skipped.skipped if skipped else []
+        if not skipped:
+            return text
+        lines = [text, f"{len(skipped)} ligne(s) ignorée(s) :"]
+        for row in skipped[:10]:
+            lines.append(f"  ligne {row.line} : {row.first_name} {row.last_name} ({row.job}) — {row.reason}")
+        if len(skipped) > 10:
+            lines.append(f"  … et {len(skipped) - 10} autre(s)")
+        return "\n".join(lines)
 
     def on_import_ui(self):
         dlg = BulkAddDialog(self)
@@ -152,15 +263,16 @@ class MainWindow(QMainWindow):
 
         self.page_participants.reload()
         self._update_lead_ratio()
-        QMessageBox.information(self, "Import terminé", f"{added} participant(s) ajouté(s).")
+        QMessageBox.information(self, "Import terminé", self._import_summary(f"{added} participant(s) ajouté(s)."))
 
     def on_export_excel(self):
+        self._flush_settings()
         try:
-            info = self.persistence.get_event_info()
-            plan = self.persistence.load_plan()
+            snap = self.persistence.snapshot()
         except RuntimeError:
             QMessageBox.warning(self, "Aucune réunion", "Ouvrez ou créez une réunion avant d'exporter.")
             return
+        info, plan = snap.event, snap.plan
 
         if not plan:
             QMessageBox.warning(self, "Aucun plan", "Générez ou chargez un plan de table avant d'exporter le plan.")
@@ -172,7 +284,7 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            output = self.export_service.export_plan_excel(Path(path))
+            output = self.export_service.export_plan_excel(Path(path), snapshot=snap)
         except Exception as exc:
             log.exception("Export Excel échoué")
             QMessageBox.critical(self, "Erreur d'export", str(exc))
@@ -181,11 +293,13 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Export terminé", f"Fichier généré : {output}")
 
     def on_export_template(self):
+        self._flush_settings()
         try:
-            info = self.persistence.get_event_info()
+            snap = self.persistence.snapshot()
         except RuntimeError:
             QMessageBox.warning(self, "Aucune réunion", "Ouvrez ou créez une réunion avant d'exporter.")
             return
+        info = snap.event
 
         suggested = f"{(info.get('name') or 'participants').strip() or 'participants'}_modele.xlsx"
         path, _ = QFileDialog.getSaveFileName(self, "Exporter un exemple pour import", suggested, "Excel (*.xlsx)")
@@ -193,7 +307,7 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            output = self.export_service.export_import_template(Path(path))
+            output = self.export_service.export_import_template(Path(path), snapshot=snap)
         except Exception as exc:
             log.exception("Export du modèle Excel échoué")
             QMessageBox.critical(self, "Erreur d'export", str(exc))
@@ -202,11 +316,13 @@ class MainWindow(QMainWindow):
         QMessageBox.information(self, "Export terminé", f"Modèle généré : {output}")
 
     def on_export_badges(self):
+        self._flush_settings()
         try:
-            info = self.persistence.get_event_info()
+            snap = self.persistence.snapshot()
         except RuntimeError:
             QMessageBox.warning(self, "Aucune réunion", "Ouvrez ou créez une réunion avant d'exporter.")
             return
+        info = snap.event
 
         event_name = (info.get("name") or "badges").strip()
         suggested = f"{event_name or 'badges'}.pdf"
@@ -215,7 +331,7 @@ class MainWindow(QMainWindow):
             return
 
         try:
-            output = self.export_service.export_badges_pdf(Path(path))
+            output = self.export_service.export_badges_pdf(Path(path), snapshot=snap)
         except Exception as exc:
             log.exception("Export des badges échoué")
             QMessageBox.critical(self, "Erreur d'export", str(exc))
@@ -233,16 +349,45 @@ class MainWindow(QMainWindow):
         path, _ = QFileDialog.getSaveFileName(self, "Enregistrer la réunion", "", "SQLite DB (*.db)")
         if not path: return
         db_path = Path(path)
+        self._flush_settings()
         self.persistence.new_event(db_path, name, start, end)
         self._after_open_or_create()
 
     def on_open_event(self):
         path, _ = QFileDialog.getOpenFileName(self, "Ouvrir une réunion", "", "SQLite DB (*.db)")
         if not path: return
+        self._flush_settings()
         self.persistence.open_event(Path(path))
         self._after_open_or_create()
 
+    def on_switch_event(self):
+        self._flush_settings()
+        if self.persistence.db_path is None:
+            QMessageBox.warning(self, "Aucune réunion", "Ouvrez d'abord un fichier de réunions."); return
+        dlg = EventListDialog(self.persistence, self)
+        if not dlg.exec(): return
+        event_id = dlg.selected_event_id()
+        if event_id is None or event_id == self.persistence.event_id: return
+        self.persistence.switch_event(event_id)
+        self._after_open_or_create()
+
+    def on_clone_event(self):
+        self._flush_settings()
+        try:
+            self.persistence.get_event_info()
+        except RuntimeError:
+            QMessageBox.warning(self, "Aucune réunion", "Ouvrez ou créez une réunion à dupliquer."); return
+        dlg = NewEventDialog(self)
+        dlg.setWindowTitle("Dupliquer la réunion")
+        if not dlg.exec(): return
+        name, start, end = dlg.get_values()
+        if not name:
+            QMessageBox.warning(self, "Nom requis", "Merci de renseigner un nom d'événement."); return
+        self.persistence.clone_event(name, start, end)
+        self._after_open_or_create()
+
     def on_close_event(self):
+        self._flush_settings()
         self.persistence.close_event()
         self.lbl_event.setText("Aucune réunion")
         self.lbl_ratio.setText("Chefs de table: 0/0")
@@ -252,28 +397,32 @@ class MainWindow(QMainWindow):
         self.page_plan.clear_views()
 
     def _after_open_or_create(self):
-        info = self.persistence.get_event_info()
-        self.lbl_event.setText(f"Événement: {info['name']}")
+        # une seule lecture de la réunion pour toutes les pages
+        snap = self.persistence.snapshot()
+        self.lbl_event.setText(f"Événement: {snap.event['name']}")
         # charger les pages
         self.page_participants.reload()
-        self.page_settings.load_from_event()
-        self.page_plan.load_existing_plan()
-        self._update_lead_ratio()
+        self.page_plan.load_existing_plan(snap)
+        self._update_lead_ratio(snap)
 
     def _on_params_changed(self):
-        # Rafraîchir libellé d'événement (nom) + ratio chefs
+        # Rafraîchir libellé d'événement (nom) + ratio chefs ; la page Settings est déjà à jour
         try:
             info = self.persistence.get_event_info()
             self.lbl_event.setText(f"Événement: {info['name']}")
         except RuntimeError:
             pass
-        self._update_lead_ratio()
+        self._update_lead_ratio(reload_settings=False)
+
+    def _flush_settings(self):
+        # écrit les réglages encore en attente (écriture différée) avant de lire ou quitter la réunion
+        self.page_settings.flush_pending()
 
-    def _update_lead_ratio(self):
+    def _update_lead_ratio(self, snap=None, reload_settings=True):
         try:
-            leads, total = self.persistence.count_leads()
+            leads, total = (snap.leads, snap.total_tables) if snap else self.persistence.count_leads()
             self.lbl_ratio.setText(f"Chefs de table: {leads}/{total}")
-            if hasattr(self, "page_settings"):
+            if reload_settings and hasattr(self, "page_settings"):
                 self.page_settings.load_from_event()
         except RuntimeError:
             self.lbl_ratio.setText("Chefs de table: 0/0")
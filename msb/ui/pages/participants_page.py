@@ -116,7 +116,9 @@ class ParticipantsPage(QWidget):
         sel = self.table.selectionModel().selectedRows()
         if not sel: return
         rows = [self.model.rows[r.row()] for r in sel]
-        names = ", ".join(f"{p.first_name} {p.last_name}".strip() for p in rows)
+        names = ", ".join(f"{p.first_name} {p.last_name}".strip() for p in rows[:10])
+        if len(rows) > 10:
+            names += f" et {len(rows) - 10} autre(s)"
         confirm = QMessageBox.question(
             self,
             "Confirmer la suppression",
@@ -125,7 +127,6 @@ class ParticipantsPage(QWidget):
         if confirm != QMessageBox.Yes:
             return
 
-        for p in rows:
-            self.p.remove_participant(int(p.id))
+        self.p.remove_participants(int(p.id) for p in rows)
         self.reload()
         if self.on_ratio_changed: self.on_ratio_changed()
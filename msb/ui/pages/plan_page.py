@@ -1,22 +1,37 @@
 from __future__ import annotations
+from functools import partial
 from msb.services.persistence import Persistence
-from msb.services.planner import Planner
+from msb.services.planner import ConstructivePlanner
+from msb.ui.plan_worker import PlanWorker
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QTabWidget, QTableWidget, QTableWidgetItem,
-    QMessageBox, QGroupBox, QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QTextEdit
+    QMessageBox, QGroupBox, QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QTextEdit, QInputDialog,
+    QProgressDialog
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThreadPool
 
 class PlanPage(QWidget):
-    def __init__(self, persistence: Persistence):
+    # budget (secondes) de la génération multi-départ (glouton + recherche locale)
+    PLAN_TIME_BUDGET_SECONDS = 2.0
+    # nombre maximal de départs (graines); None = autant que le budget le permet
+    PLAN_STARTS = None
+    # budget (secondes) de la re-planification des sessions restantes
+    REPLAN_TIME_BUDGET_SECONDS = 0.5
+
+    def __init__(self, persistence: Persistence, before_read=None):
         super().__init__()
         self.p = persistence
-        self.planner = Planner()
+        # appelé avant de lire les paramètres (écrit les réglages encore en attente)
+        self.before_read = before_read
+        self.planner = ConstructivePlanner()
 
         v = QVBoxLayout(self)
         self.btn_generate = QPushButton("Générer/Mettre à jour le plan", self)
         self.btn_generate.clicked.connect(self.generate_plan)
         v.addWidget(self.btn_generate)
+        self.btn_replan = QPushButton("Re-planifier les sessions restantes (retards/départs)…", self)
+        self.btn_replan.clicked.connect(self.replan_remaining)
+        v.addWidget(self.btn_replan)
 
         self.tabs = QTabWidget(self)
         self.tab_by_table = QTableWidget(self)
@@ -48,6 +63,11 @@ class PlanPage(QWidget):
 
         v.addWidget(box)
 
+        # génération en cours (worker + boîte de progression)
+        self._worker = None
+        self._progress = None
+        self._step_name = "Essai"
+
         # caches pour les listes détaillées
         self._last_pairs_repeat = []  # list[tuple[int,int]]
         self._last_pairs_never = []  # list[tuple[int,int]]
@@ -60,29 +80,34 @@ class PlanPage(QWidget):
         self.lbl_pairs_repeat.setText("Paires en doublon: 0")
         self.lbl_pairs_never.setText("Paires jamais rencontrées: 0")
 
-    def load_existing_plan(self):
+    def load_existing_plan(self, snap=None):
+        """snap: EventSnapshot déjà lu (ouverture de réunion), sinon lu ici."""
         try:
-            plan = self.p.load_plan()
+            snap = snap or self.p.snapshot()
         except RuntimeError:
-            plan = []
-        self.render_plan(plan)
-        self._update_stats_panel(plan)
-
-    def generate_plan(self):
-        from PySide6.QtWidgets import QMessageBox
+            self.render_plan([])
+            self._update_stats_panel([])
+            return
+        self.render_plan(snap.plan, snap.participants)
+        self._update_stats_panel(snap.plan, snap.participants)
 
+    def _planning_inputs(self, snap=None):
+        """
+        Valide le contexte (chefs, capacités) et prépare les entrées du planner.
+        Renvoie (T, S, caps, lead_ids, rotator_ids), ou None après avoir averti l'utilisateur.
+        """
         # 1) Charger contexte
         try:
-            info = self.p.get_event_info()
-            rows = list(self.p.list_participants())
+            snap = snap or self.p.snapshot()
         except RuntimeError:
             QMessageBox.warning(self, "Aucun événement", "Créez/ouvrez une réunion d'abord.")
-            return
+            return None
+        info, rows = snap.event, snap.participants
 
         N = len(rows)
         if N == 0:
             QMessageBox.information(self, "Aucun participant", "Ajoutez des participants avant de générer.")
-            return
+            return None
 
         T = max(1, info.get("num_tables") or 1)
 
@@ -93,7 +118,7 @@ class PlanPage(QWidget):
                 self, "Chefs de table requis",
                 f"Il faut sélectionner exactement {T} chef(s) de table (actuellement {len(leads)})."
             )
-            return
+            return None
 
         # 3) Faisabilité: tout le monde doit être assis, 6..10 par table
         # => condition nécessaire: 6*T <= N <= 10*T
@@ -103,14 +128,14 @@ class PlanPage(QWidget):
                 f"Avec {T} tables, il faut au moins {6 * T} participants (6 par table). "
                 f"Participants actuels: {N}."
             )
-            return
+            return None
         if N > 10 * T:
             QMessageBox.warning(
                 self, "Capacité dépassée",
                 f"Avec {T} tables, on ne peut pas dépasser {10 * T} participants (10 par table). "
                 f"Participants actuels: {N}. Augmentez le nombre de tables."
             )
-            return
+            return None
 
         # 4) Calcul des capacités exactes par table (6..10) avec somme == N
         # Stratégie: démarrer à 6 partout, puis distribuer le reste jusqu'à atteindre N (sans dépasser 10)
@@ -124,24 +149,95 @@ class PlanPage(QWidget):
             idx = (idx + 1) % T
 
         # 5) Préparer les IDs chefs fixes et les autres personnes
-        #    (1 chef par table; on aligne les chefs aux tables 0..T-1 selon l'ordre actuel)
+        #    (1 chef par table; on aligne les chefs aux tables 0..T-1 selon l'ordre actuel ;
+        #    en re-planification, Planner.replan_remaining les remet à leur table déjà tenue)
         lead_ids = [p.id for p in leads[:T]]
         fixed_lead_set = set(lead_ids)
         rotator_ids = [p.id for p in rows if p.id not in fixed_lead_set]
 
         # 6) Récupérer le nombre de sessions (priorité fixe à exclusivité)
         S = max(1, info.get("session_count") or 1)
+        return T, S, caps, lead_ids, rotator_ids
 
-        # 7) Générer le plan via le planner
-        #    Planner attendu: build_plan(num_tables, sessions, table_capacities, fixed_leads, people)
-        plan = self.planner.build_plan(
+    def generate_plan(self):
+        if self.before_read: self.before_read()
+        inputs = self._planning_inputs()
+        if inputs is None:
+            return
+        T, S, caps, lead_ids, rotator_ids = inputs
+
+        # 7) Générer le plan via le planner, hors du thread UI: plusieurs graines
+        #    en parallèle (glouton + recherche locale chacune), on garde le meilleur plan
+        job = partial(
+            self.planner.build_plan_multistart,
             num_tables=T,
             sessions=S,
             table_capacities=caps,
             fixed_leads=lead_ids,  # chefs fixes (optionnels, ici requis et fournis)
-            people=rotator_ids
+            people=rotator_ids,
+            starts=self.PLAN_STARTS,
+            time_budget=self.PLAN_TIME_BUDGET_SECONDS,
+        )
+        self._start_worker(
+            job,
+            "Génération du plan…",
+            "Essai",
+            lambda result: self._on_plan_generated(result, T, S, caps),
         )
 
+    def _start_worker(self, job, label, step_name, on_finished):
+        """Lance job dans un PlanWorker avec une boîte de progression annulable."""
+        worker = PlanWorker(job)
+        dlg = QProgressDialog(label, "Annuler", 0, 0, self)
+        dlg.setWindowTitle("Plan de table")
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(0)
+        dlg.setAutoClose(False)
+        dlg.setAutoReset(False)
+        dlg.canceled.connect(worker.cancel)
+
+        worker.signals.progress.connect(self._on_generation_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.failed.connect(self._on_generation_failed)
+        worker.signals.cancelled.connect(self._on_generation_cancelled)
+
+        self._worker, self._progress, self._step_name = worker, dlg, step_name
+        self._set_busy(True)
+        dlg.show()
+        QThreadPool.globalInstance().start(worker)
+
+    def _set_busy(self, busy: bool):
+        self.btn_generate.setEnabled(not busy)
+        self.btn_replan.setEnabled(not busy)
+
+    def _end_generation(self):
+        if self._progress is not None:
+            self._progress.close()
+        self._worker = self._progress = None
+        self._set_busy(False)
+
+    def _on_generation_progress(self, done, total, best):
+        if self._progress is None:
+            return
+        # total = 0 : nombre d'essais borné par le temps seulement (barre indéterminée)
+        self._progress.setMaximum(total)
+        self._progress.setValue(done if total else 0)
+        text = f"{self._step_name} {done}/{total}" if total else f"{self._step_name} {done}"
+        if best is not None:
+            text += f" — meilleur: {best.repeated_pairs} paire(s) en doublon"
+        self._progress.setLabelText(text)
+
+    def _on_generation_failed(self, message):
+        self._end_generation()
+        QMessageBox.critical(self, "Erreur de génération", message)
+
+    def _on_generation_cancelled(self):
+        self._end_generation()
+
+    def _on_plan_generated(self, result, T, S, caps):
+        self._end_generation()
+        plan = result.plan
+
         # 8) Sauvegarde en DB + rendu + stats
         self.p.save_plan(plan)
         self.render_plan(plan)
@@ -152,21 +248,90 @@ class PlanPage(QWidget):
             self, "Plan généré",
             f"Plan de {S} session(s) généré avec {T} table(s).\n"
             f"Capacités par table: {caps}\n"
+            f"Paires en doublon: {result.score.repeated_pairs} | "
+            f"Retours à une même table: {result.score.retable_visits}\n"
+            f"Meilleur de {result.runs} essai(s), graine {result.seed}\n"
+        )
+
+    def replan_remaining(self):
+        """Garde les sessions déjà tenues et recalcule les suivantes avec les participants actuels."""
+        if self.before_read: self.before_read()
+        try:
+            snap = self.p.snapshot()
+        except RuntimeError:
+            QMessageBox.warning(self, "Aucun événement", "Créez/ouvrez une réunion d'abord.")
+            return
+        current = snap.plan_lists()
+        inputs = self._planning_inputs(snap)
+        if inputs is None:
+            return
+        T, S, caps, lead_ids, rotator_ids = inputs
+
+        max_held = min(len(current), S) - 1
+        if max_held < 1:
+            QMessageBox.information(
+                self, "Aucun plan à reprendre",
+                "Il faut un plan d'au moins 2 sessions pour re-planifier les sessions restantes."
+            )
+            return
+        held, ok = QInputDialog.getInt(
+            self, "Re-planifier", "Nombre de sessions déjà tenues :", 1, 1, max_held
+        )
+        if not ok:
+            return
+
+        if any(len(tables) != T for tables in current[:held]):
+            QMessageBox.warning(
+                self, "Re-planification impossible",
+                "Le nombre de tables diffère de celui des sessions déjà tenues."
+            )
+            return
+
+        # recalcul hors du thread UI, comme la génération (progression + annulation)
+        job = partial(
+            self.planner.replan_remaining,
+            current[:held],
+            num_tables=T,
+            sessions=S,
+            table_capacities=caps,
+            fixed_leads=lead_ids,
+            people=rotator_ids,
+            time_budget=self.REPLAN_TIME_BUDGET_SECONDS,
+        )
+        self._start_worker(
+            job,
+            "Re-planification des sessions restantes…",
+            "Session",
+            lambda plan: self._on_plan_replanned(plan, held, S),
+        )
+
+    def _on_plan_replanned(self, plan, held, S):
+        self._end_generation()
+
+        # seules les sessions recalculées sont réécrites en base
+        self.p.save_plan(plan, from_session=held)
+        self.render_plan(plan)
+        self._update_stats_panel(plan)
+        QMessageBox.information(
+            self, "Plan mis à jour",
+            f"Sessions 1 à {held} conservées, sessions {held + 1} à {S} recalculées."
         )
 
     # ou raw_plan selon ce que tu passes à render_plan
 
-    def render_plan(self, plan):
+    def render_plan(self, plan, participants=None):
+        """participants: liste ordonnée déjà lue (snapshot), sinon relue via le cache de Persistence."""
         if not plan:
             self.clear_views(); return
+        try:
+            ordered = list(participants) if participants is not None else self.p.list_participants()
+        except RuntimeError:
+            ordered = []
         # Vue par table
         S = len(plan); T = len(plan[0]) if S>0 else 0
         self.tab_by_table.setRowCount(S); self.tab_by_table.setColumnCount(T)
         # on a besoin des noms depuis la DB
-        try:
-            parts = {p.id: p for p in self.p.list_participants()}
-        except RuntimeError:
-            parts = {}
+        parts = {p.id: p for p in ordered}
         for s in range(S):
             for t in range(T):
                 pids = plan[s][t]
@@ -183,10 +348,6 @@ class PlanPage(QWidget):
         self.tab_by_table.resizeColumnsToContents(); self.tab_by_table.resizeRowsToContents()
 
         # Vue par participant
-        try:
-            ordered = list(self.p.list_participants())
-        except RuntimeError:
-            ordered = []
         self.tab_by_participant.setRowCount(len(ordered)); self.tab_by_participant.setColumnCount(S)
         for r, p in enumerate(ordered):
             for s in range(S):
@@ -201,7 +362,7 @@ class PlanPage(QWidget):
         self.tab_by_participant.setHorizontalHeaderLabels([f"S{i+1}" for i in range(S)])
         self.tab_by_participant.resizeColumnsToContents(); self.tab_by_participant.resizeRowsToContents()
 
-    def _compute_plan_stats(self, plan):
+    def _compute_plan_stats(self, plan, participants=None):
         """
         Retourne:
           - repeated: list de paires (pid1,pid2) rencontrées >1 fois
@@ -212,7 +373,7 @@ class PlanPage(QWidget):
 
         # Liste des participants impliqués dans le plan (depuis la DB pour être sûr)
         try:
-            parts = list(self.p.list_participants())
+            parts = list(participants) if participants is not None else self.p.list_participants()
         except RuntimeError:
             parts = []
         ids = [p.id for p in parts]
@@ -248,8 +409,8 @@ class PlanPage(QWidget):
 
         return repeated, never
 
-    def _update_stats_panel(self, plan):
-        rep, nev = self._compute_plan_stats(plan)
+    def _update_stats_panel(self, plan, participants=None):
+        rep, nev = self._compute_plan_stats(plan, participants)
         self._last_pairs_repeat = rep
         self._last_pairs_never = nev
         self.lbl_pairs_repeat.setText(f"Paires en doublon: {len(rep)}")
@@ -264,7 +425,7 @@ class PlanPage(QWidget):
     def _show_pairs_dialog(self, pairs, title):
         # map id -> participant
         try:
-            parts = {p.id: p for p in self.p.list_participants()}
+            parts = self.p.participants_by_id()
         except RuntimeError:
             parts = {}
 
@@ -26,6 +26,9 @@ class Settings:
     pause_minutes: int
 
 class SettingsPage(QWidget):
+    # délai de regroupement des modifications de paramètres (une écriture par rafale)
+    PARAMS_DEBOUNCE_MS = 250
+
     def __init__(self, persistence: Persistence, on_changed):
         super().__init__()
         self.p = persistence
@@ -93,18 +96,29 @@ class SettingsPage(QWidget):
         self.ev_start.dateTimeChanged.connect(self._schedule_apply_general)  # ✅ idem pour la date
         self.ev_end.dateTimeChanged.connect(self._schedule_apply_general)
 
+        # Sessions / pauses : écriture différée, regroupée par rafale (flèche maintenue, saisie…)
+        self._pending_params: dict = {}   # modifications pas encore écrites
+        self._saved_params: dict = {}     # dernières valeurs connues en base
+        self._params_timer = QTimer(self)
+        self._params_timer.setSingleShot(True)
+        self._params_timer.setInterval(self.PARAMS_DEBOUNCE_MS)
+        self._params_timer.timeout.connect(self.flush_pending)
+
         for w in (self.num_tables, self.cap_min, self.cap_max, self.session_count, self.dur, self.trans):
-            w.valueChanged.connect(self._apply_sessions)
+            w.valueChanged.connect(self._schedule_apply_sessions)
 
         for w in (self.pause_count, self.pause_minutes):
-            w.valueChanged.connect(self._apply_pauses)
+            w.valueChanged.connect(self._schedule_apply_pauses)
 
     # --------- Load / Apply ----------
     def load_from_event(self):
+        # ne pas perdre une rafale en cours : elle est écrite avant de relire la base
+        self.flush_pending()
         self._loading = True
         try:
             info = self.p.get_event_info()
         except RuntimeError:
+            self._saved_params = {}
             # remise à zéro
             now = QDateTime.currentDateTime()
             self.ev_name.setText("")
@@ -118,6 +132,7 @@ class SettingsPage(QWidget):
             self.trans.setValue(2)
             self.pause_count.setValue(0)
             self.pause_minutes.setValue(0)
+            self._loading = False
             self._update_info()
             return
 
@@ -135,12 +150,18 @@ class SettingsPage(QWidget):
         # Pauses
         self.pause_count.setValue(info["pause_count"] or 0)
         self.pause_minutes.setValue(info["pause_minutes"] or 0)
+        self._saved_params = {
+            key: info[key]
+            for key in ("num_tables", "cap_min", "cap_max", "session_count", "dur", "trans",
+                        "pause_count", "pause_minutes")
+        }
 
         # Auto-suggestion si 0 tables et participants existants
         if (info["num_tables"] or 0) == 0:
             try:
-                n = len(self.p.list_participants())
+                n = self.p.participant_count()
                 if n > 0:
+                    self._loading = False
                     self.num_tables.setValue(max(1, round(n / 8)))
                     self._apply_sessions()
             except RuntimeError:
@@ -150,51 +171,77 @@ class SettingsPage(QWidget):
         self._update_info()
 
     # Sessions
-    def _apply_sessions(self):
+    def _schedule_apply_sessions(self):
+        if self._loading:
+            return
         cap_min = min(self.cap_min.value(), self.cap_max.value())
         cap_max = max(self.cap_min.value(), self.cap_max.value())
-        try:
-            self.p.update_event_params(
-                num_tables=self.num_tables.value(),
-                cap_min=cap_min,
-                cap_max=cap_max,
-                session_count=self.session_count.value(),
-                dur=self.dur.value(),
-                trans=self.trans.value(),
-            )
-        except RuntimeError:
+        self._pending_params.update(
+            num_tables=self.num_tables.value(),
+            cap_min=cap_min,
+            cap_max=cap_max,
+            session_count=self.session_count.value(),
+            dur=self.dur.value(),
+            trans=self.trans.value(),
+        )
+        self._update_info()  # bandeau recalculé depuis les champs, sans attendre l'écriture
+        self._params_timer.start()
+
+    def _apply_sessions(self):
+        # écriture immédiate (auto-tune, suggestion à l'ouverture)
+        self._schedule_apply_sessions()
+        self.flush_pending()
+
+    # Pauses
+    def _schedule_apply_pauses(self):
+        if self._loading:
             return
+        self._pending_params.update(
+            pause_count=self.pause_count.value(),
+            pause_minutes=self.pause_minutes.value(),
+        )
         self._update_info()
-        if self.on_changed: self.on_changed()
+        self._params_timer.start()
 
-    # Pauses
     def _apply_pauses(self):
+        self._schedule_apply_pauses()
+        self.flush_pending()
+
+    def flush_pending(self):
+        """Écrit en une transaction les paramètres modifiés depuis la dernière écriture."""
+        self._params_timer.stop()
+        if self._general_timer.isActive():
+            self._general_timer.stop()
+            self._apply_general()
+        pending, self._pending_params = self._pending_params, {}
+        changes = {k: v for k, v in pending.items() if self._saved_params.get(k) != v}
+        if not changes:
+            return
         try:
-            self.p.update_event_params(
-                pause_count=self.pause_count.value(),
-                pause_minutes=self.pause_minutes.value(),
-            )
+            self.p.update_event_params(**changes)
         except RuntimeError:
             return
-        self._update_info()
+        self._saved_params.update(changes)
         if self.on_changed: self.on_changed()
 
     # Info bandeau
     def _update_info(self):
+        # calculé depuis les champs affichés (identiques à la base, ou sur le point d'y être écrits)
         try:
-            info = self.p.get_event_info()
-            n = len(self.p.list_participants())
+            n = self.p.participant_count()
         except RuntimeError:
             self.info.setText(""); return
 
         # budget théorique hors pauses
-        total_minutes = max(0, int((info["date_end"] - info["date_start"]).total_seconds() // 60))
-        pauses = (info["pause_count"] or 0) * (info["pause_minutes"] or 0)
+        start = self.ev_start.dateTime().toPython()
+        end = self.ev_end.dateTime().toPython()
+        total_minutes = max(0, int((end - start).total_seconds() // 60))
+        pauses = self.pause_count.value() * self.pause_minutes.value()
         usable = max(0, total_minutes - pauses)
-        slot = (info["dur"] or 0) + (info["trans"] or 0)
+        slot = self.dur.value() + self.trans.value()
         sessions_fit = (usable // slot) if slot > 0 else 0
 
-        target_per_table = self._target_capacity(n, info["num_tables"] or 0, info["cap_min"] or 6, info["cap_max"] or 10)
+        target_per_table = self._target_capacity(n, self.num_tables.value(), self.cap_min.value(), self.cap_max.value())
 
         self.info.setText(
             f"Participants: {n} | Cible/table ≈ {target_per_table} | Budget utile ≈ {usable} min | "
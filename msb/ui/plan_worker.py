@@ -0,0 +1,48 @@
+from __future__ import annotations
+import logging
+from typing import Callable
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from msb.services.planner import CancellationToken, PlanningCancelled
+
+log = logging.getLogger(__name__)
+
+
+class PlanWorkerSignals(QObject):
+    # (étapes faites, étapes totales, meilleur score connu ou None)
+    progress = Signal(int, int, object)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class PlanWorker(QRunnable):
+    """
+    Exécute un calcul de plan hors du thread UI (QThreadPool).
+    job(progress, cancel) reçoit un callback de progression et un CancellationToken;
+    les résultats reviennent au thread UI via les signaux (connexions en file).
+    """
+
+    def __init__(self, job: Callable[..., object]) -> None:
+        super().__init__()
+        self.job = job
+        self.signals = PlanWorkerSignals()
+        self.token = CancellationToken()
+
+    def cancel(self) -> None:
+        self.token.cancel()
+
+    def run(self) -> None:
+        try:
+            result = self.job(progress=self._report, cancel=self.token)
+        except PlanningCancelled:
+            self.signals.cancelled.emit()
+        except Exception as exc:
+            log.exception("Génération du plan échouée")
+            self.signals.failed.emit(str(exc))
+        else:
+            self.signals.finished.emit(result)
+
+    def _report(self, done: int, total: int, best) -> None:
+        self.signals.progress.emit(done, total, best)
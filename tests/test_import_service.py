@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
+import pytest
 from openpyxl import Workbook
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -58,3 +59,139 @@ def test_import_excel_booleans_are_case_insensitive(tmp_path):
     assert added == 2
     assert any(p.first_name == "Claire" and p.is_guest and not p.is_table_lead for p in participants)
     assert any(p.first_name == "Denis" and p.is_guest and not p.is_table_lead for p in participants)
+
+
+def test_import_excel_streams_in_chunks_and_skips_duplicates(tmp_path):
+    persistence = _make_event(tmp_path)
+    importer = ImportService(persistence)
+    importer.IMPORT_CHUNK_SIZE = 3
+
+    excel_path = tmp_path / "participants.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Prénom", "Nom", "Métier", "Remarque", "Visiteur", "Chef de table"])
+    for i in range(7):
+        ws.append([f"P{i}", f"N{i}", "Job", "x", "Non", "Oui" if i == 0 else "Non"])
+    ws.append(["P1", "N1", "Job"])  # doublon, ligne courte
+    ws.append([None, None, None])
+    wb.save(excel_path)
+
+    added = importer.import_from_excel(excel_path)
+
+    assert added == 7
+    assert persistence.participant_count() == 7
+    assert persistence.count_leads()[0] == 1
+
+
+def test_import_csv_detects_delimiter_and_encoding(tmp_path):
+    persistence = _make_event(tmp_path)
+    importer = ImportService(persistence)
+
+    cp1252 = tmp_path / "crm.csv"
+    cp1252.write_bytes(
+        "Prénom;Nom;Métier;Visiteur;Chef de table\r\n"
+        "Hélène;Dupré;Décoratrice;Oui;Non\r\n"
+        "Marc;Petit;Coach;non;OUI\r\n".encode("cp1252")
+    )
+    bom_tsv = tmp_path / "export.tsv"
+    bom_tsv.write_bytes(
+        "﻿prenom\tnom\tmetier\nZoé\tZola\tJuriste\n".encode("utf-8")
+    )
+
+    assert importer.import_from_csv(cp1252) == 2
+    assert importer.import_from_csv(bom_tsv) == 1
+
+    participants = {p.first_name: p for p in persistence.list_participants()}
+    assert participants["Hélène"].job == "Décoratrice" and participants["Hélène"].is_guest
+    assert participants["Marc"].is_table_lead
+    assert participants["Zoé"].last_name == "Zola"
+
+
+def test_import_csv_missing_columns_message_does_not_mention_excel(tmp_path):
+    persistence = _make_event(tmp_path)
+    csv_path = tmp_path / "roster.csv"
+    csv_path.write_text("Prénom;Nom\nAda;Lovelace\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="manquantes dans le fichier"):
+        ImportService(persistence).import_from_csv(csv_path)
+
+
+def test_reimport_is_idempotent_and_reports_skipped_rows(tmp_path):
+    persistence = _make_event(tmp_path)
+    persistence.add_participant("Hélène", "Dupré", "Décoratrice", False, False)
+    importer = ImportService(persistence)
+
+    csv_path = tmp_path / "roster.csv"
+    csv_path.write_text(
+        "Prénom;Nom;Métier\n"
+        "helene;DUPRE;Decoratrice\n"
+        "Marc;Petit;Coach\n"
+        "Marc ; Petit;coach\n",
+        encoding="utf-8",
+    )
+
+    assert importer.import_from_csv(csv_path) == 1
+    assert [(r.line, r.reason) for r in importer.last_report.skipped] == [
+        (2, ImportService.REASON_IN_EVENT),
+        (4, ImportService.REASON_IN_FILE),
+    ]
+
+    assert importer.import_from_csv(csv_path) == 0
+    assert len(importer.last_report.skipped) == 3
+    assert persistence.participant_count() == 2
+
+
+def test_sync_from_rows_applies_diff_and_keeps_plan(tmp_path):
+    persistence = _make_event(tmp_path)
+    for first in ("Anna", "Bruno", "Chloé", "David"):
+        persistence.add_participant(first, "X", "Job", False, False)
+    ids = {p.first_name: p.id for p in persistence.list_participants()}
+    persistence.save_plan([[[ids["Anna"], ids["Bruno"]], [ids["Chloé"], ids["David"]]]])
+    importer = ImportService(persistence)
+
+    rows = [
+        {"first_name": "anna", "last_name": "x", "job": "job"},
+        {"first_name": "Bruno", "last_name": "X", "job": "Job", "is_table_lead": True},
+        {"first_name": "Chloe", "last_name": "X", "job": "Job"},
+        {"first_name": "Émile", "last_name": "Y", "job": "Job"},
+        {"first_name": "Emile", "last_name": "Y", "job": "Job"},
+    ]
+    report = importer.sync_from_rows(rows, remove_missing=True)
+
+    assert (report.added, report.updated, report.removed, report.unchanged) == (1, 1, 1, 2)
+    assert [r.line for r in report.skipped] == [5]
+    by_name = {p.first_name: p for p in persistence.list_participants()}
+    assert set(by_name) == {"Anna", "Bruno", "Chloé", "Émile"}
+    assert by_name["Bruno"].is_table_lead
+    assert persistence.load_plan() == [[[ids["Anna"], ids["Bruno"]], [ids["Chloé"]]]]
+
+
+def test_sync_refuses_blank_sheet_and_never_removes_everyone(tmp_path):
+    persistence = _make_event(tmp_path)
+    for first in ("Anna", "Bruno"):
+        persistence.add_participant(first, "X", "Job", False, False)
+    ids = [p.id for p in persistence.list_participants()]
+    persistence.save_plan([[ids]])
+    importer = ImportService(persistence)
+
+    blank = tmp_path / "blank.xlsx"
+    Workbook().save(blank)
+    with pytest.raises(ValueError, match="en-tête"):
+        importer.sync_from_excel(blank, remove_missing=True)
+
+    header_only = tmp_path / "header_only.xlsx"
+    wb = Workbook()
+    wb.active.append(["Prénom", "Nom", "Métier"])
+    wb.save(header_only)
+    with pytest.raises(ValueError, match="supprimerait les 2 participant"):
+        importer.sync_from_excel(header_only, remove_missing=True)
+    with pytest.raises(ValueError, match="supprimerait"):
+        importer.sync_from_rows([], remove_missing=True)
+
+    # l'aperçu donne le bilan sans rien écrire
+    preview = importer.sync_from_rows([{"first_name": "Zoé", "last_name": "Z", "job": "Job"}],
+                                      remove_missing=True, dry_run=True)
+    assert (preview.added, preview.removed) == (1, 2)
+
+    assert persistence.participant_count() == 2
+    assert persistence.load_plan() == [[ids]]
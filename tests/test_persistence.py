@@ -0,0 +1,279 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from msb.services.persistence import Persistence
+
+
+def _make_event(tmp_path, participants=0):
+    persistence = Persistence()
+    now = datetime.now()
+    persistence.new_event(tmp_path / "event.db", "Event", now, now + timedelta(hours=1))
+    for i in range(participants):
+        persistence.add_participant(f"P{i}", f"N{i}", "Job", False, False)
+    return persistence
+
+
+def _ids(persistence):
+    return sorted(p.id for p in persistence.list_participants())
+
+
+def test_save_and_load_plan_round_trip(tmp_path):
+    persistence = _make_event(tmp_path, participants=6)
+    a, b, c, d, e, f = _ids(persistence)
+    plan = [[[a, b, c], [d, e, f]], [[a, d, e], [b, c, f]]]
+
+    persistence.save_plan(plan)
+
+    assert persistence.load_plan() == plan
+
+
+def test_save_plan_from_session_keeps_earlier_sessions(tmp_path):
+    persistence = _make_event(tmp_path, participants=6)
+    a, b, c, d, e, f = _ids(persistence)
+    persistence.save_plan([[[a, b, c], [d, e, f]], [[a, d, e], [b, c, f]]])
+
+    persistence.save_plan(
+        [[[f, e, d], [c, b, a]], [[a, b, f], [c, d, e]], [[a, c, e], [b, d, f]]],
+        from_session=1,
+    )
+
+    assert persistence.load_plan() == [
+        [[a, b, c], [d, e, f]],
+        [[a, b, f], [c, d, e]],
+        [[a, c, e], [b, d, f]],
+    ]
+
+
+def test_load_plan_keeps_empty_tables(tmp_path):
+    persistence = _make_event(tmp_path, participants=4)
+    a, b, c, d = _ids(persistence)
+    plan = [[[a, b], [], [c, d]], [[], [a, c], [b, d]]]
+
+    persistence.save_plan(plan)
+
+    assert persistence.load_plan() == plan
+
+
+def test_open_event_adds_seating_index_to_old_database(tmp_path):
+    from sqlalchemy import inspect, text
+
+    persistence = _make_event(tmp_path, participants=2)
+    with persistence.engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_seatings_event_session_table"))
+    persistence.close_event()
+
+    reopened = Persistence()
+    reopened.open_event(tmp_path / "event.db")
+
+    names = {ix["name"] for ix in inspect(reopened.engine).get_indexes("seatings")}
+    assert "ix_seatings_event_session_table" in names
+
+
+def test_upgrade_schema_does_not_write_when_schema_is_current(tmp_path):
+    from sqlalchemy import event
+    from msb.infra.db import upgrade_schema
+
+    persistence = _make_event(tmp_path, participants=2)
+    statements, commits = [], []
+    event.listen(persistence.engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    event.listen(persistence.engine, "commit", lambda conn: commits.append(conn))
+
+    upgrade_schema(persistence.engine)
+
+    assert statements
+    assert not [s for s in statements if s.lstrip().upper().startswith("CREATE")]
+    assert not commits
+
+
+def test_sqlite_profiles_apply_pragmas(tmp_path):
+    from sqlalchemy import text
+
+    fast = _make_event(tmp_path)
+    with fast.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    fast.engine.dispose()
+    fast.close_event()
+
+    durable = Persistence(sqlite_profile="durable")
+    durable.open_event(tmp_path / "event.db")
+    with durable.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 2  # FULL
+
+
+def test_network_drives_are_detected_on_windows(monkeypatch):
+    from msb.infra import db
+
+    assert db._is_network_path(Path("\\\\serveur\\partage\\event.db"))
+    monkeypatch.setattr(db.sys, "platform", "win32")
+    drive_types = {"C:\\": 3, "Z:\\": 4, "Q:\\": 0}  # fixe, réseau, inconnu
+    monkeypatch.setattr(db, "_drive_type", drive_types.__getitem__)
+
+    assert not db._is_network_path(Path("C:\\Réunions\\event.db"))
+    assert db._is_network_path(Path("Z:\\Réunions\\event.db"))
+    assert db._is_network_path(Path("Q:\\event.db"))
+
+
+def test_plan_codec_round_trip():
+    from msb.infra.plan_codec import decode_session, encode_session
+
+    tables = [[3, 1, 2], [], [10, 20]]
+    assert decode_session(encode_session(tables)) == tables
+
+
+def test_packed_plan_storage_round_trip_and_conversion(tmp_path):
+    persistence = _make_event(tmp_path, participants=6)
+    persistence.plan_storage = "packed"
+    a, b, c, d, e, f = _ids(persistence)
+    plan = [[[a, b, c], [d, e, f]], [[a, d, e], [b, c, f]]]
+
+    persistence.save_plan(plan)
+    assert persistence.load_plan() == plan
+
+    persistence.convert_plan_storage("rows")
+    assert persistence.load_plan() == plan
+    persistence.convert_plan_storage("packed")
+    assert persistence.load_plan() == plan
+
+    persistence.remove_participant(a)
+    assert persistence.load_plan() == [[[b, c], [d, e, f]], [[d, e], [b, c, f]]]
+
+
+def test_save_plan_from_session_converts_kept_sessions(tmp_path):
+    persistence = _make_event(tmp_path, participants=4)
+    a, b, c, d = _ids(persistence)
+    persistence.save_plan([[[a, b], [c, d]], [[a, c], [b, d]]])
+
+    persistence.plan_storage = "packed"
+    persistence.save_plan([[[a, b], [c, d]], [[a, d], [b, c]]], from_session=1)
+
+    assert persistence.load_plan() == [[[a, b], [c, d]], [[a, d], [b, c]]]
+
+
+def test_participant_cache_is_invalidated_by_writes(tmp_path):
+    persistence = _make_event(tmp_path, participants=2)
+    first = persistence.list_participants()
+    assert persistence.list_participants() == first
+    assert persistence.participant_count() == 2
+
+    pid = persistence.add_participant("Zoé", "Zola", "Job", False, False)
+    assert persistence.participant_count() == 3
+    assert persistence.participants_by_id()[pid].first_name == "Zoé"
+
+    persistence.update_participant(pid, job="Autre")
+    assert persistence.participants_by_id()[pid].job == "Autre"
+
+    persistence.remove_participant(pid)
+    assert pid not in persistence.participants_by_id()
+    assert persistence.participant_count() == 2
+
+
+def test_snapshot_bundles_event_participants_plan_and_leads(tmp_path):
+    persistence = _make_event(tmp_path, participants=4)
+    persistence.update_event_params(num_tables=2)
+    a, b, c, d = _ids(persistence)
+    persistence.update_participant(a, is_table_lead=True)
+    persistence.save_plan([[[a, b], [c, d]]])
+
+    snap = persistence.snapshot()
+
+    assert snap.event["num_tables"] == 2
+    assert [p.id for p in snap.participants] == [p.id for p in persistence.list_participants()]
+    assert snap.plan == (((a, b), (c, d)),)
+    assert snap.plan_lists() == [[[a, b], [c, d]]]
+    assert (snap.leads, snap.total_tables) == persistence.count_leads() == (1, 2)
+    assert snap.participants_by_id[b].id == b
+
+
+def test_add_participants_bulk_conflict_modes(tmp_path):
+    import pytest
+    from sqlalchemy.exc import IntegrityError
+
+    persistence = _make_event(tmp_path)
+    alice = {"first_name": "Alice", "last_name": "Doe", "job": "Dev"}
+    bob = {"first_name": "Bob", "last_name": "Smith", "job": "Coach"}
+
+    result = persistence.add_participants_bulk([alice, bob, dict(alice)])
+    assert (result.inserted, result.skipped, result.updated) == (2, 1, 0)
+
+    result = persistence.add_participants_bulk([dict(alice, is_table_lead=True)], on_conflict="update")
+    assert (result.inserted, result.skipped, result.updated) == (0, 0, 1)
+    assert [p.is_table_lead for p in persistence.list_participants() if p.first_name == "Alice"] == [True]
+
+    # lignes identiques à la base : pas comptées comme mises à jour
+    result = persistence.add_participants_bulk(
+        [dict(alice, is_table_lead=True), bob, dict(bob, is_guest=True)], on_conflict="update"
+    )
+    assert (result.inserted, result.updated, result.unchanged) == (0, 1, 2)
+
+    with pytest.raises(IntegrityError):
+        persistence.add_participants_bulk([{"first_name": "Eve", "last_name": "X", "job": "J"}, bob], on_conflict="error")
+    assert persistence.participant_count() == 2
+
+
+def test_remove_participants_in_chunks_clears_plan_seats(tmp_path, monkeypatch):
+    persistence = _make_event(tmp_path, participants=7)
+    a, b, c, d, e, f, g = _ids(persistence)
+    persistence.save_plan([[[a, b, c], [d, e, f, g]]])
+    monkeypatch.setattr(Persistence, "DELETE_CHUNK_SIZE", 2)
+
+    removed = persistence.remove_participants([a, d, e, g, 10_000])
+
+    assert removed == 4
+    assert _ids(persistence) == [b, c, f]
+    assert persistence.load_plan() == [[[b, c], [f]]]
+
+
+def test_engine_registry_reuses_and_evicts_engines(tmp_path):
+    from msb.infra.db import EngineRegistry
+
+    registry = EngineRegistry(max_engines=2)
+    persistence = Persistence(engines=registry)
+    now = datetime.now()
+    persistence.new_event(tmp_path / "a.db", "A", now, now)
+    engine_a = persistence.engine
+    persistence.close_event()
+    assert engine_a.pool.checkedin() == 0  # connexions fermées à la fermeture
+
+    persistence.open_event(tmp_path / "a.db")
+    assert persistence.engine is engine_a
+
+    persistence.new_event(tmp_path / "b.db", "B", now, now)
+    persistence.new_event(tmp_path / "c.db", "C", now, now)
+    assert len(registry) == 2
+    persistence.open_event(tmp_path / "a.db")
+    assert persistence.engine is not engine_a
+
+
+def test_archive_lists_switches_and_clones_events(tmp_path):
+    persistence = _make_event(tmp_path, participants=3)
+    first_id = persistence.event_id
+    persistence.update_event_params(num_tables=2, session_count=4)
+    a, b, c = _ids(persistence)
+    persistence.save_plan([[[a], [b, c]]])
+
+    start = datetime.now() + timedelta(days=7)
+    clone_id = persistence.clone_event("Semaine 2", start, start + timedelta(hours=1))
+
+    assert persistence.event_id == clone_id
+    assert persistence.participant_count() == 3
+    assert persistence.get_event_info()["session_count"] == 4
+    assert persistence.load_plan() == []
+
+    events = persistence.list_events()
+    assert [e["id"] for e in events] == [clone_id, first_id]
+    assert [e["id"] for e in persistence.list_events(offset=1, limit=1)] == [first_id]
+    assert persistence.count_events() == 2
+
+    persistence.switch_event(first_id)
+    assert persistence.load_plan() == [[[a], [b, c]]]
+
+    persistence.close_event()
+    assert Persistence().open_event(tmp_path / "event.db", event_id=first_id) == first_id
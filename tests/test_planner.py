@@ -1,4 +1,6 @@
 import sys
+import threading
+import time
 from collections import Counter, defaultdict
 from pathlib import Path
 
@@ -8,7 +10,13 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from msb.services.planner import Planner
+from msb.services.planner import (
+    CancellationToken,
+    ConstructivePlanner,
+    Planner,
+    PlanningCancelled,
+    score_plan,
+)
 
 
 def _tables_by_person(plan, excluded=None):
@@ -157,3 +165,372 @@ def test_pairs_not_repeated_when_rotation_possible():
 
     assert len(pair_counts) >= 4
     assert all(count <= 2 for count in pair_counts.values())
+
+
+def test_numpy_backend_matches_python_backend():
+    pytest.importorskip("numpy")
+    kwargs = dict(
+        num_tables=5,
+        sessions=6,
+        table_capacities=[8, 8, 7, 7, 7],
+        fixed_leads=[100, 101, 102, 103, 104],
+        people=list(range(32)),
+        seed=3,
+    )
+
+    assert Planner(backend="numpy").build_plan(**kwargs) == Planner(backend="python").build_plan(**kwargs)
+
+
+def test_numpy_backend_matches_python_backend_across_batches_with_history():
+    pytest.importorskip("numpy")
+    leads = list(range(1000, 1020))
+    kwargs = dict(
+        num_tables=20,
+        table_capacities=[8] * 10 + [7] * 10,
+        fixed_leads=leads,
+        people=list(range(130)),
+        seed=9,
+    )
+    # 130 personnes: plusieurs lots par session, historique de re-planification
+    past = Planner(backend="python").build_plan(sessions=3, **kwargs)
+
+    numpy_plan = list(Planner(backend="numpy").build_plan_iter(sessions=5, history=past, **kwargs))
+    python_plan = list(Planner(backend="python").build_plan_iter(sessions=5, history=past, **kwargs))
+    assert numpy_plan == python_plan
+
+
+def test_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        Planner(backend="gpu")
+
+
+def test_score_plan_counts_repeats_retables_and_never_met():
+    plan = [
+        [[10, 0, 1], [11, 2, 3]],
+        [[10, 0, 1], [11, 2, 3]],
+    ]
+
+    score = score_plan(plan, fixed_leads=[10, 11])
+
+    # 6 paires intra-table répétées, 4 rotatifs revenus à leur table, 15 - 6 paires jamais vues
+    assert score.repeated_pairs == 6
+    assert score.retable_visits == 4
+    assert score.never_met == 9
+
+
+def test_improve_plan_keeps_leads_and_capacities_and_never_worsens():
+    planner = Planner()
+    leads = [100, 101, 102, 103, 104, 105, 106]
+    plan = planner.build_plan(
+        num_tables=7,
+        sessions=7,
+        table_capacities=[7] * 7,
+        fixed_leads=leads,
+        people=list(range(42)),
+        seed=1,
+    )
+
+    improved, stats = planner.improve_plan(
+        plan, fixed_leads=leads, time_budget=30.0, max_iterations=20_000, seed=1
+    )
+
+    assert stats.initial == score_plan(plan, leads)
+    assert stats.final == score_plan(improved, leads)
+    assert stats.final.repeated_pairs < stats.initial.repeated_pairs
+    assert stats.iterations == 20_000
+    for before, after in zip(plan, improved):
+        assert [len(t) for t in after] == [len(t) for t in before]
+        assert sorted(p for t in after for p in t) == sorted(p for t in before for p in t)
+        assert [t[0] for t in after] == leads
+
+
+def test_improve_plan_respects_time_budget():
+    planner = Planner()
+    plan = planner.build_plan(
+        num_tables=8,
+        sessions=8,
+        table_capacities=[8] * 8,
+        fixed_leads=[],
+        people=list(range(64)),
+        seed=2,
+    )
+
+    _, stats = planner.improve_plan(plan, fixed_leads=[], time_budget=0.2, seed=2)
+
+    assert stats.elapsed < 1.0
+
+
+def test_multistart_returns_best_reproducible_plan():
+    planner = Planner()
+    params = dict(
+        num_tables=4,
+        sessions=4,
+        table_capacities=[6, 6, 6, 6],
+        fixed_leads=[100, 101, 102, 103],
+        people=list(range(20)),
+    )
+
+    result = planner.build_plan_multistart(
+        **params, starts=3, max_workers=2, time_budget=60.0, seed=11, improve_iterations=2_000
+    )
+
+    assert result.runs == 3
+    replay, score = planner.build_improved_plan(
+        **params, seed=result.seed, improve_iterations=result.improve_iterations
+    )
+    assert replay == result.plan
+    assert score == result.score == score_plan(result.plan, params["fixed_leads"])
+
+
+@pytest.mark.parametrize("q", [7, 8])
+def test_constructive_planner_is_optimal_for_affine_plane_formats(q):
+    planner = ConstructivePlanner()
+    leads = list(range(100, 100 + q))
+    plan = planner.build_plan(
+        num_tables=q,
+        sessions=q,
+        table_capacities=[q] * q,
+        fixed_leads=leads,
+        people=list(range(q * q - q)),
+        seed=4,
+    )
+
+    score = score_plan(plan, leads)
+    assert score.repeated_pairs == 0
+    assert score.retable_visits == 0
+    for session in plan:
+        assert [t[0] for t in session] == leads
+        assert all(len(t) == q for t in session)
+
+
+def test_constructive_planner_without_leads_covers_every_pair_once():
+    plan = ConstructivePlanner().build_plan(
+        num_tables=4,
+        sessions=5,
+        table_capacities=[4] * 4,
+        fixed_leads=[],
+        people=list(range(16)),
+    )
+
+    score = score_plan(plan)
+    assert score.repeated_pairs == 0
+    assert score.never_met == 0
+
+
+def test_constructive_planner_falls_back_to_heuristic():
+    params = dict(
+        num_tables=6,
+        sessions=3,
+        table_capacities=[6] * 6,
+        fixed_leads=[],
+        people=list(range(36)),
+        seed=5,
+    )
+
+    assert ConstructivePlanner().construct(**params) is None
+    assert ConstructivePlanner().build_plan(**params) == Planner().build_plan(**params)
+
+
+def test_build_plan_iter_streams_same_sessions_as_build_plan():
+    params = dict(
+        num_tables=3,
+        sessions=4,
+        table_capacities=[7, 7, 6],
+        fixed_leads=[100, 101, 102],
+        people=list(range(17)),
+        seed=8,
+    )
+    sessions = Planner().build_plan_iter(**params)
+
+    first = next(sessions)
+
+    assert [t[0] for t in first] == [100, 101, 102]
+    assert [first, *sessions] == Planner().build_plan(**params)
+
+
+def test_build_plan_iter_validates_eagerly():
+    with pytest.raises(ValueError):
+        Planner().build_plan_iter(
+            num_tables=2,
+            sessions=1,
+            table_capacities=[2, 2],
+            fixed_leads=[],
+            people=[0],
+        )
+
+
+def test_replan_remaining_keeps_past_sessions_and_seats_newcomers():
+    planner = Planner()
+    leads = [100, 101, 102]
+    past = planner.build_plan(
+        num_tables=3,
+        sessions=2,
+        table_capacities=[7, 7, 7],
+        fixed_leads=leads,
+        people=list(range(18)),
+        seed=6,
+    )
+    # 17 quitte l'événement, 50 et 51 arrivent en retard
+    people = [p for p in range(18) if p != 17] + [50, 51]
+
+    params = dict(
+        num_tables=3,
+        table_capacities=[8, 7, 7],
+        fixed_leads=leads,
+        people=people,
+        seed=6,
+    )
+
+    plan = planner.replan_remaining(past, sessions=4, time_budget=0.2, **params)
+
+    assert len(plan) == 4
+    assert plan[:2] == past
+    for session in plan[2:]:
+        assert sorted(p for t in session for p in t) == sorted(leads + people)
+        assert [t[0] for t in session] == leads
+    # l'historique compte: bien mieux que de recoller un plan calculé sans lui
+    naive = past + planner.build_plan(sessions=2, **params)
+    assert score_plan(plan, leads).key() < score_plan(naive, leads).key()
+
+
+def test_build_plan_reports_progress_and_honours_cancellation():
+    params = dict(
+        num_tables=3,
+        sessions=4,
+        table_capacities=[6, 6, 6],
+        fixed_leads=[],
+        people=list(range(18)),
+        seed=1,
+    )
+    calls = []
+    token = CancellationToken()
+
+    def progress(done, total, best):
+        calls.append((done, total))
+        if done == 2:
+            token.cancel()
+
+    with pytest.raises(PlanningCancelled):
+        Planner().build_plan(**params, progress=progress, cancel=token)
+    assert calls == [(1, 4), (2, 4)]
+
+
+def test_multistart_progress_reports_best_score():
+    seen = []
+    result = Planner().build_plan_multistart(
+        num_tables=3,
+        sessions=3,
+        table_capacities=[6, 6, 6],
+        fixed_leads=[],
+        people=list(range(18)),
+        starts=3,
+        max_workers=1,
+        time_budget=60.0,
+        seed=2,
+        improve_iterations=500,
+        progress=lambda done, total, best: seen.append((done, total, best)),
+    )
+
+    assert [(d, t) for d, t, _ in seen] == [(1, 3), (2, 3), (3, 3)]
+    assert seen[-1][2] == result.score
+
+
+def test_replan_remaining_keeps_leads_at_their_tables_when_a_lead_is_replaced():
+    planner = Planner()
+    leads = [100, 101, 102, 103]
+    past = planner.build_plan(
+        num_tables=4,
+        sessions=2,
+        table_capacities=[7, 7, 7, 7],
+        fixed_leads=leads,
+        people=list(range(24)),
+        seed=3,
+    )
+    # 102 s'en va ; 5 (dont le nom trie avant les autres) devient chef
+    new_leads = [5, 100, 101, 103]
+    people = [p for p in range(24) if p != 5]
+
+    plan = planner.replan_remaining(
+        past,
+        num_tables=4,
+        sessions=4,
+        table_capacities=[7, 7, 7, 6],
+        fixed_leads=new_leads,
+        people=people,
+        seed=3,
+        time_budget=0.1,
+    )
+
+    assert [t[0] for t in past[-1]] == leads
+    for session in plan[2:]:
+        assert [t[0] for t in session] == [100, 101, 5, 103]
+
+
+def test_replan_remaining_reports_progress_and_honours_cancellation():
+    planner = Planner()
+    params = dict(
+        num_tables=3,
+        table_capacities=[6, 6, 6],
+        fixed_leads=[],
+        people=list(range(18)),
+        seed=4,
+    )
+    past = planner.build_plan(sessions=1, **params)
+    calls = []
+    token = CancellationToken()
+
+    def progress(done, total, best):
+        calls.append((done, total))
+        token.cancel()
+
+    with pytest.raises(PlanningCancelled):
+        planner.replan_remaining(past, sessions=4, progress=progress, cancel=token, **params)
+    assert calls == [(1, 3)]
+
+
+def test_multistart_keeps_trying_seeds_until_the_budget_is_spent():
+    params = dict(
+        num_tables=3,
+        sessions=3,
+        table_capacities=[6, 6, 6],
+        fixed_leads=[],
+        people=list(range(18)),
+    )
+    seen = []
+    result = Planner().build_plan_multistart(
+        **params,
+        max_workers=1,
+        time_budget=0.3,
+        seed=5,
+        improve_iterations=200,
+        progress=lambda done, total, best: seen.append(total),
+    )
+
+    assert result.runs > 1
+    assert set(seen) == {0}
+
+
+def test_multistart_cancellation_stops_running_worker_processes():
+    token = CancellationToken()
+    timer = threading.Timer(0.5, token.cancel)
+    started = time.perf_counter()
+    timer.start()
+    try:
+        with pytest.raises(PlanningCancelled):
+            Planner().build_plan_multistart(
+                num_tables=4,
+                sessions=6,
+                table_capacities=[6, 6, 6, 6],
+                fixed_leads=[],
+                people=list(range(24)),
+                starts=2,
+                max_workers=2,
+                time_budget=60.0,
+                seed=1,
+                improve_iterations=10**9,
+                cancel=token,
+            )
+    finally:
+        timer.cancel()
+    # les départs en cours sont arrêtés au lieu de tourner jusqu'au bout
+    assert time.perf_counter() - started < 10